@@ -150,5 +150,106 @@ def backup():
     except Exception as e:
         click.echo(f"❌ Backup failed: {e}")
 
+@cli.command()
+def match_stats():
+    """Show saved match statistics"""
+    from database import get_match_statistics
+    
+    app = create_app()
+    with app.app_context():
+        stats = get_match_statistics()
+        if stats is None:
+            click.echo("❌ Could not compute match statistics")
+            return
+        click.echo(f"🎯 Match Statistics:")
+        click.echo(f"   Matches: {stats['total_matches']}")
+        click.echo(f"   Average technical score: {stats['average_technical_score']:.1f}%")
+        click.echo(f"   Average combined score: {stats['average_combined_score']:.1f}")
+        for bucket in stats['technical_histogram']:
+            click.echo(f"   Technical {bucket['range']}: {bucket['count']}")
+        for match in stats['best_technical_matches']:
+            click.echo(f"   🏆 {match['project_name']} - {match['developer_name']}: {match['technical_match']:.1f}%")
+
+@cli.command()
+def rebuild_match_summaries():
+    """Rebuild the per-project match summaries from match_results"""
+    from database import rebuild_match_summaries as rebuild
+    
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if rebuild():
+            click.echo("✅ Match summaries rebuilt!")
+
+@cli.command()
+@click.option('--limit', default=None, type=int, help='Maximum number of stale pairs to recompute')
+def recompute_matches(limit):
+    """Recompute only the match results marked as stale"""
+    app = create_app()
+    with app.app_context():
+        from match_staleness import recompute_stale_matches
+        
+        refreshed = recompute_stale_matches(limit)
+        click.echo(f"✅ Recomputed {refreshed} stale match results")
+
+@cli.command()
+def rebuild_technical_scores():
+    """Rebuild the precomputed technical match matrix"""
+    app = create_app()
+    with app.app_context():
+        from score_matrix import rebuild_technical_scores as rebuild
+        
+        db.create_all()
+        rebuild()
+        click.echo("✅ Technical scores rebuilt!")
+
+@cli.command()
+def clear_analysis_cache():
+    """Delete every cached AI match analysis"""
+    app = create_app()
+    with app.app_context():
+        from match_cache import clear_analysis_cache as clear
+        
+        db.create_all()
+        if clear():
+            click.echo("✅ Analysis cache cleared!")
+
+@cli.command()
+def audit_partitions():
+    """Create the audit_history partitions for the upcoming months (PostgreSQL)"""
+    from audit_partitions import ensure_partitions, is_partitioned, partition_name
+    
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            if not is_partitioned(connection):
+                click.echo("ℹ️  audit_history is not partitioned; nothing to do")
+                return
+            created = ensure_partitions(connection)
+        for month in created:
+            click.echo(f"   ➕ {partition_name(month)}")
+        click.echo(f"✅ {len(created)} partitions created")
+
+@cli.command()
+@click.option('--months', default=None, type=int, help='Months of audit history to keep (default AUDIT_RETENTION_MONTHS)')
+@click.option('--output-dir', default=None, help='Folder for the compressed archives (default AUDIT_ARCHIVE_DIR)')
+def archive_audit(months, output_dir):
+    """Archive audit history older than the retention window and drop it"""
+    from audit_partitions import archive_old_months, partition_name, AUDIT_RETENTION_MONTHS, AUDIT_ARCHIVE_DIR
+    
+    months = AUDIT_RETENTION_MONTHS if months is None else months
+    output_dir = output_dir or AUDIT_ARCHIVE_DIR
+    app = create_app()
+    with app.app_context():
+        try:
+            archived = archive_old_months(db.engine, months, output_dir)
+        except Exception as e:
+            click.echo(f"❌ Archive failed: {e}")
+            return
+        for month, path, count in archived:
+            if path:
+                click.echo(f"   📦 {partition_name(month)}: {count} rows -> {path}")
+        click.echo(f"✅ Archived {sum(count for _, _, count in archived)} audit rows older than {months} months")
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
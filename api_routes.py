@@ -4,26 +4,83 @@
 # ============================================================
 
 from flask import Blueprint, jsonify, request
+from sqlalchemy import func
+from sqlalchemy.orm import load_only, selectinload
 from models import db, Developer, Technology, Experience, Project
+from ranking import parse_weights, rank_project_candidates
 
 # Crear blueprint para la API
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Máximo de candidatos devueltos por /api/projects/<id>/candidates
+MAX_CANDIDATES = 100
+
+# Tamaño de página por defecto y máximo de los listados
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def paginated_list(model, relations=()):
+    """
+    Listado paginado por cursor (keyset sobre id) con proyección de campos.
+    Parámetros: limit, after (último id recibido), fields (separados por coma), include_total.
+    Devuelve (datos, paginación). Un campo desconocido en fields lanza KeyError.
+    """
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    after = request.args.get('after', type=int)
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()] or None
+    include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+    
+    query = model.query
+    if fields:
+        # Solo se cargan las columnas y relaciones pedidas
+        columns = [getattr(model, field) for field in fields if field in model.__table__.columns.keys()]
+        query = query.options(load_only(model.id, *columns))
+        relations = [relation for relation in relations if relation in fields]
+    query = query.options(*[selectinload(getattr(model, relation)) for relation in relations])
+    
+    if after is not None:
+        query = query.filter(model.id > after)
+    items = query.order_by(model.id).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    
+    pagination = {
+        'limit': limit,
+        'has_more': has_more,
+        'next_after': items[-1].id if has_more else None
+    }
+    if include_total:
+        pagination['total'] = db.session.query(func.count(model.id)).scalar()
+    
+    return [item.to_dict(fields) for item in items], pagination
+
+def unknown_field_response(error):
+    """Respuesta 400 para un campo desconocido en el parámetro fields"""
+    return jsonify({
+        'success': False,
+        'code': 400,
+        'message': f'Campo desconocido en fields: {error.args[0]}',
+        'data': None
+    }), 400
+
 # ============================================================
 # CRUD: DEVELOPERS
 # ============================================================
 
 @api_bp.route('/developers', methods=['GET'])
 def get_developers():
-    """GET /api/developers - Listar todos los desarrolladores"""
+    """GET /api/developers - Listar desarrolladores (paginado: limit, after, fields, include_total)"""
     try:
-        developers = Developer.query.all()
+        developers, pagination = paginated_list(Developer, relations=('skills', 'experiences'))
         return jsonify({
             'success': True,
             'code': 200,
             'message': 'Desarrolladores recuperados exitosamente',
-            'data': [dev.to_dict() for dev in developers]
+            'data': developers,
+            'pagination': pagination
         }), 200
+    except KeyError as e:
+        return unknown_field_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -200,15 +257,18 @@ def delete_developer(id):
 
 @api_bp.route('/projects', methods=['GET'])
 def get_projects():
-    """GET /api/projects - Listar todos los proyectos"""
+    """GET /api/projects - Listar proyectos (paginado: limit, after, fields, include_total)"""
     try:
-        projects = Project.query.all()
+        projects, pagination = paginated_list(Project, relations=('required_technologies',))
         return jsonify({
             'success': True,
             'code': 200,
             'message': 'Proyectos recuperados exitosamente',
-            'data': [proj.to_dict() for proj in projects]
+            'data': projects,
+            'pagination': pagination
         }), 200
+    except KeyError as e:
+        return unknown_field_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -244,6 +304,56 @@ def get_project(id):
             'data': None
         }), 500
 
+@api_bp.route('/projects/<int:id>/candidates', methods=['GET'])
+def get_project_candidates(id):
+    """GET /api/projects/<id>/candidates?k=&min_score=&weights= - Mejores K desarrolladores para un proyecto"""
+    try:
+        project = Project.query.get(id)
+        if not project:
+            return jsonify({
+                'success': False,
+                'code': 404,
+                'message': f'Proyecto con ID {id} no encontrado',
+                'data': None
+            }), 404
+
+        k = request.args.get('k', 10, type=int)
+        min_score = request.args.get('min_score', 0, type=float)
+        if k < 1 or k > MAX_CANDIDATES:
+            return jsonify({
+                'success': False,
+                'code': 400,
+                'message': f'k debe estar entre 1 y {MAX_CANDIDATES}',
+                'data': None
+            }), 400
+
+        # Pesos opcionales de técnico, IA técnica, IA motivacional e IA experiencia (p. ej. 2,1,1,1)
+        weights = None
+        if request.args.get('weights'):
+            try:
+                weights = parse_weights(request.args['weights'])
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'code': 400,
+                    'message': 'weights debe tener 4 números no negativos separados por coma',
+                    'data': None
+                }), 400
+
+        return jsonify({
+            'success': True,
+            'code': 200,
+            'message': 'Candidatos recuperados exitosamente',
+            'data': rank_project_candidates(id, k=k, min_score=min_score, weights=weights)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'code': 500,
+            'message': f'Error al obtener candidatos: {str(e)}',
+            'data': None
+        }), 500
+
 @api_bp.route('/projects', methods=['POST'])
 def create_project():
     """POST /api/projects - Crear un nuevo proyecto"""
@@ -390,15 +500,18 @@ def delete_project(id):
 
 @api_bp.route('/technologies', methods=['GET'])
 def get_technologies():
-    """GET /api/technologies - Listar todas las tecnologías"""
+    """GET /api/technologies - Listar tecnologías (paginado: limit, after, fields, include_total)"""
     try:
-        technologies = Technology.query.all()
+        technologies, pagination = paginated_list(Technology)
         return jsonify({
             'success': True,
             'code': 200,
             'message': 'Tecnologías recuperadas exitosamente',
-            'data': [tech.to_dict() for tech in technologies]
+            'data': technologies,
+            'pagination': pagination
         }), 200
+    except KeyError as e:
+        return unknown_field_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -558,15 +671,18 @@ def delete_technology(id):
 
 @api_bp.route('/experiences', methods=['GET'])
 def get_experiences():
-    """GET /api/experiences - Listar todas las experiencias"""
+    """GET /api/experiences - Listar experiencias (paginado: limit, after, fields, include_total)"""
     try:
-        experiences = Experience.query.all()
+        experiences, pagination = paginated_list(Experience)
         return jsonify({
             'success': True,
             'code': 200,
             'message': 'Experiencias recuperadas exitosamente',
-            'data': [exp.to_dict() for exp in experiences]
+            'data': experiences,
+            'pagination': pagination
         }), 200
+    except KeyError as e:
+        return unknown_field_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
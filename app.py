@@ -3,15 +3,24 @@
 # ============================================================
 
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, stream_with_context
 from models import db, Developer, Technology, Experience, Project
 from database import (get_all_projects, get_all_developers, 
                      get_project_by_id, get_developer_by_id, calculate_match_db,
-                     save_match_result, get_match_results_for_project)
-from modelai3 import analyze_with_deepseek
+                     get_match_results_for_project,
+                     get_saved_matches_for_project, get_projects_with_matches)
+from match_executor import analyze_developers
+# tech_index, match_staleness and score_matrix also register the session listeners that keep
+# the technology index, stale flags and technical score matrix in sync with edits
+from tech_index import get_candidate_developers, get_llm_candidate_ids, is_llm_candidate, prefiltered_analysis
+from match_engine import score_all_projects, score_project
+from match_jobs import enqueue_match_job, get_match_job
+from match_staleness import get_project_matches, stream_project_matches
+from score_matrix import ensure_technical_scores, get_developer_technical_scores
+from ranking import rank_matches, rank_projects
+from llm_client import LLMUnavailableError, get_llm_client
 from dotenv import load_dotenv
 import json
-import subprocess
 import requests
 
 # Load environment variables
@@ -42,6 +51,7 @@ db.init_app(app)
 # Create all tables (including audit_history) if they don't exist
 with app.app_context():
     db.create_all()
+    ensure_technical_scores()
 
 # Register API Blueprint (CRUD REST endpoints)
 from api_routes import api_bp
@@ -348,15 +358,14 @@ def edit_developer(developer_id):
                 if skill:
                     developer.skills.append(skill)
             
-            # Update experiences - clear and re-add
-            Experience.query.filter_by(developer_id=developer.id).delete()
+            # Update experiences - clear and re-add (through the relationship, so the
+            # after_flush listener sees the change and marks this developer's matches stale)
+            developer.experiences.clear()
             for exp_data in experiences_data:
-                experience = Experience(
-                    developer_id=developer.id,
+                developer.experiences.append(Experience(
                     description=exp_data['description'],
                     category=exp_data['category']
-                )
-                db.session.add(experience)
+                ))
             
             db.session.commit()
             flash(f'Desarrollador {name} actualizado exitosamente!', 'success')
@@ -394,51 +403,110 @@ def delete_developer(developer_id):
 def matching():
     """Matching page where users can select project and find candidates"""
     project_id = request.args.get('project_id', type=int)
+    refresh = request.args.get('refresh', type=int)
     selected_project = None
     results = []
+    stream = False
     
     projects_list = get_all_projects()
     
     if project_id:
         selected_project = get_project_by_id(project_id)
-        if selected_project:
-            # Get project from database
-            project = Project.query.get(project_id)
-            if not project:
-                flash('Proyecto no encontrado', 'error')
-                return redirect(url_for('matching'))
-            
-            # Perform matching analysis
-            developers_list = get_all_developers()
-            for dev_dict in developers_list:
-                dev = Developer.query.get(dev_dict['id'])
-                if not dev:
-                    continue
-                
-                technical_match = calculate_match_db(selected_project, dev_dict)
-                ai_analysis = analyze_with_deepseek(selected_project, dev_dict)
-                
-                # Save match result to database
-                save_match_result(project_id, dev.id, technical_match, ai_analysis)
-                
-                results.append({
-                    "developer": dev_dict,
-                    "technical_match": technical_match,
-                    "ai_analysis": ai_analysis
-                })
-            
-            # Sort by average score (descending)
-            results.sort(key=lambda x: (
-                x["technical_match"] + 
-                x["ai_analysis"].get("technical_affinity", 0) + 
-                x["ai_analysis"].get("motivational_affinity", 0) + 
-                x["ai_analysis"].get("experience_relevance", 0)
-            ) / 4, reverse=True)
+        if not selected_project:
+            flash('Proyecto no encontrado', 'error')
+            return redirect(url_for('matching'))
+        
+        # Show the results already saved for this project
+        results = get_saved_matches_for_project(project_id)
+        
+        saved_ids = {result['developer']['id'] for result in results}
+        candidate_ids = get_llm_candidate_ids(project_id)
+        unsaved = [developer for developer in get_all_developers() if developer['id'] not in saved_ids]
+        
+        # Stream a new analysis when asked to, when saved results are stale or when
+        # a developer worth an LLM call (e.g. one added after the last run) has no result yet
+        stream = bool(refresh or any(result['is_stale'] for result in results)
+                      or any(is_llm_candidate(developer, candidate_ids) for developer in unsaved))
+        
+        # Developers outside the prefilter's top-K have no saved result: list them with their technical score
+        if not stream and unsaved:
+            technical_scores = score_project(project_id)
+            results += [
+                {
+                    "developer": developer,
+                    "technical_match": technical_scores.get(developer['id'], 0),
+                    "is_stale": False,
+                    "ai_analysis": prefiltered_analysis()
+                } for developer in unsaved
+            ]
+        
+        # Sort by combined score (descending)
+        results = rank_matches(results)
     
     return render_template('matching.html', 
                          projects=projects_list, 
                          selected_project=selected_project, 
-                         results=results)
+                         results=results,
+                         stream=stream)
+
+@app.route('/matching/stream')
+def matching_stream():
+    """Server-Sent Events: technical scores right away, then each AI analysis as soon as it finishes"""
+    project_id = request.args.get('project_id', type=int)
+    project = get_project_by_id(project_id) if project_id else None
+    if not project:
+        return jsonify({
+            'success': False,
+            'error': f'Proyecto con ID {project_id} no encontrado'
+        }), 404
+    
+    def events():
+        for event, data in stream_project_matches(project):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Don't let a reverse proxy buffer the stream
+    })
+
+@app.route('/api/matching/jobs', methods=['POST'])
+def api_create_match_job():
+    """API endpoint to enqueue the match analysis of a project"""
+    data = request.get_json(silent=True) or {}
+    project_id = data.get('project_id')
+    
+    if not project_id:
+        return jsonify({
+            'success': False,
+            'error': 'El ID del proyecto es requerido'
+        }), 400
+    
+    job = enqueue_match_job(app, int(project_id))
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': f'Proyecto con ID {project_id} no encontrado'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job
+    }), 202
+
+@app.route('/api/matching/jobs/<job_id>')
+def api_match_job_status(job_id):
+    """API endpoint that returns the status of a match job"""
+    job = get_match_job(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': f'Job {job_id} no encontrado'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job
+    }), 200
 
 @app.route('/project/<int:project_id>')
 def project_detail(project_id):
@@ -447,38 +515,11 @@ def project_detail(project_id):
     if not project:
         return "Project not found", 404
     
-    # Get project from database
-    project_obj = Project.query.get(project_id)
-    if not project_obj:
-        return "Project not found", 404
+    # Reuse fresh saved matches; only new, stale or failed pairs are analyzed (concurrently) and saved
+    matches = get_project_matches(project)
     
-    # Generate matches for this project
-    matches = []
-    developers_list = get_all_developers()
-    for dev_dict in developers_list:
-        dev = Developer.query.get(dev_dict['id'])
-        if not dev:
-            continue
-        
-        technical_match = calculate_match_db(project, dev_dict)
-        ai_analysis = analyze_with_deepseek(project, dev_dict)
-        
-        # Save match result to database
-        save_match_result(project_id, dev.id, technical_match, ai_analysis)
-        
-        matches.append({
-            "developer": dev_dict,
-            "technical_match": technical_match,
-            "ai_analysis": ai_analysis
-        })
-    
-    # Sort matches by average score
-    matches.sort(key=lambda x: (
-        x["technical_match"] + 
-        x["ai_analysis"].get("technical_affinity", 0) + 
-        x["ai_analysis"].get("motivational_affinity", 0) + 
-        x["ai_analysis"].get("experience_relevance", 0)
-    ) / 4, reverse=True)
+    # Sort matches by combined score
+    matches = rank_matches(matches)
     
     return render_template('project_detail.html', project=project, matches=matches)
 
@@ -490,65 +531,25 @@ def developer_detail(developer_id):
         return "Developer not found", 404
     
     projects_list = get_all_projects()
+    
+    # Precomputed scores cover open projects; the rest are computed here
+    technical_scores = get_developer_technical_scores(developer_id)
+    for project in projects_list:
+        if project['id'] not in technical_scores:
+            technical_scores[project['id']] = calculate_match_db(project, developer)
+    
     return render_template('developer_detail.html', 
                          developer=developer, 
                          projects=projects_list, 
-                         calculate_match=calculate_match_db)
+                         technical_scores=technical_scores)
 
 @app.route('/projects/matches')
 def projects_with_matches():
     """Show all projects with their saved matches"""
-    from models import MatchResult
-    
-    projects_list = get_all_projects()
-    projects_with_matches_data = []
-    
-    for project_dict in projects_list:
-        project = Project.query.get(project_dict['id'])
-        if not project:
-            continue
-        
-        # Get saved matches for this project
-        saved_matches = MatchResult.query.filter_by(project_id=project.id).order_by(
-            MatchResult.technical_match.desc()
-        ).all()
-        
-        matches_data = []
-        for match_result in saved_matches:
-            developer = Developer.query.get(match_result.developer_id)
-            if developer:
-                matches_data.append({
-                    "match_result": match_result,
-                    "developer": developer.to_dict(),
-                    "technical_match": match_result.technical_match,
-                    "ai_technical_affinity": match_result.ai_technical_affinity,
-                    "ai_motivational_affinity": match_result.ai_motivational_affinity,
-                    "ai_experience_relevance": match_result.ai_experience_relevance,
-                    "ai_comment": match_result.ai_comment,
-                    "created_at": match_result.created_at
-                })
-        
-        # Calculate average match score
-        avg_score = 0
-        if matches_data:
-            total = sum([
-                m["technical_match"] + 
-                (m["ai_technical_affinity"] or 0) + 
-                (m["ai_motivational_affinity"] or 0) + 
-                (m["ai_experience_relevance"] or 0)
-                for m in matches_data
-            ])
-            avg_score = total / (len(matches_data) * 4) if matches_data else 0
-        
-        projects_with_matches_data.append({
-            "project": project_dict,
-            "matches": matches_data,
-            "match_count": len(matches_data),
-            "average_score": avg_score
-        })
+    projects_with_matches_data = get_projects_with_matches()
     
     # Sort by match count (descending) and then by average score
-    projects_with_matches_data.sort(key=lambda x: (x["match_count"], x["average_score"]), reverse=True)
+    projects_with_matches_data = rank_projects(projects_with_matches_data)
     
     # Calculate statistics
     total_matches = sum(p["match_count"] for p in projects_with_matches_data)
@@ -569,6 +570,7 @@ def api_results():
     
     projects_list = get_all_projects()
     developers_list = get_all_developers()
+    technical_scores = score_all_projects()
     
     for project in projects_list:
         project_results = {
@@ -576,9 +578,12 @@ def api_results():
             "matches": []
         }
         
+        # Developers outside the prefilter's top-K are listed with their technical score only
+        candidates = get_candidate_developers(project['id'], developers_list)
+        analyses = dict(zip((dev['id'] for dev in candidates), analyze_developers(project, candidates)))
         for dev in developers_list:
-            score = calculate_match_db(project, dev)
-            analysis = analyze_with_deepseek(project, dev)
+            analysis = analyses.get(dev['id']) or prefiltered_analysis()
+            score = technical_scores[project['id']].get(dev['id'], 0)
             
             match_data = {
                 "developer": dev,
@@ -704,36 +709,8 @@ RULES:
 - Respond ONLY with the JSON, without additional text"""
     
     try:
-        # Get Ollama host and port from environment variables
-        ollama_host = os.getenv('OLLAMA_HOST', 'localhost')
-        ollama_port = os.getenv('OLLAMA_PORT', '11434')
-        
-        # Use requests to call Ollama API instead of subprocess for better Docker compatibility
-        
-        # Prepare the API request
-        api_url = f"http://{ollama_host}:{ollama_port}/api/generate"
-        payload = {
-            "model": "deepseek-r1:1.5b",
-            "prompt": prompt,
-            "stream": False
-        }
-        
-        # Make the API request
-        response = requests.post(api_url, json=payload, timeout=60)
-        
-        if response.status_code == 200:
-            result_data = response.json()
-            output = result_data.get('response', '').strip()
-        else:
-            # Fallback to subprocess if API fails
-            result = subprocess.run(
-                ["ollama", "run", "deepseek-r1:1.5b"],
-                input=prompt.encode("utf-8"),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=60
-            )
-            output = result.stdout.decode("utf-8").strip()
+        # Shared keep-alive client for the Ollama API; generation stops once the JSON answer is complete
+        output = get_llm_client().generate_json(prompt)
         
         # Clean the output: remove "Thinking..." and text before JSON
         output_lower = output.lower()
@@ -861,7 +838,13 @@ RULES:
             # Fallback: crear respuesta básica con análisis simple
             return create_fallback_response(project_description, tech_names)
             
-    except subprocess.TimeoutExpired:
+    except LLMUnavailableError:
+        # Circuit breaker open: answer right away from the text analysis instead of waiting on the model
+        response = create_fallback_response(project_description, tech_names)
+        response["reasoning"] = "The AI service is temporarily unavailable. A basic response was generated based on text analysis."
+        response["degraded"] = True
+        return response
+    except requests.Timeout:
         return {
             "error": "The AI query took too long. Please try again.",
             "name": extract_project_name(project_description),
@@ -1071,176 +1054,134 @@ def api_analyze_project():
             'error': f'Error al analizar proyecto: {str(e)}'
         }), 500
 
-@app.route('/auditoria')
-def auditoria():
-    """Página de auditoría que muestra información de creación y modificación"""
-    from models import Developer, Project, AuditHistory
+# Registros por página y cambios mostrados por entidad en la auditoría
+AUDIT_PAGE_SIZE = int(os.getenv('AUDIT_PAGE_SIZE', '20'))
+AUDIT_CHANGES_PER_ENTITY = int(os.getenv('AUDIT_CHANGES_PER_ENTITY', '50'))
+
+def get_audit_history(entity_ids_by_type, limit_per_entity=AUDIT_CHANGES_PER_ENTITY):
+    """
+    Historial de cambios de las entidades indicadas en una sola consulta.
+    row_number() limita los cambios por entidad usando el índice (entity_type, entity_id, fecha_modificacion).
+    Devuelve {(entity_type, entity_id): [cambios agrupados por fecha]}.
+    """
+    from sqlalchemy import and_, or_, select
+    from sqlalchemy.orm import aliased
+    from models import AuditHistory
     
-    # Asegurar que la tabla audit_history existe
-    try:
-        db.create_all()
-    except Exception as e:
-        pass  # La tabla ya existe o hay otro error
+    conditions = [
+        and_(AuditHistory.entity_type == entity_type, AuditHistory.entity_id.in_(entity_ids))
+        for entity_type, entity_ids in entity_ids_by_type.items() if entity_ids
+    ]
+    if not conditions:
+        return {}
     
-    # Obtener todos los developers con información de auditoría
-    developers = Developer.query.order_by(Developer.fecha_creacion.desc()).all()
-    developers_data = []
-    for dev in developers:
-        # Obtener historial de cambios para este developer
-        try:
-            changes = AuditHistory.query.filter_by(
-                entity_type='Developer',
-                entity_id=dev.id
-            ).order_by(AuditHistory.fecha_modificacion.desc()).all()
-        except Exception:
-            # Si la tabla no existe aún, usar lista vacía
-            changes = []
-        
-        # Agrupar cambios por fecha de modificación
-        changes_by_date = {}
-        for change in changes:
-            date_key = change.fecha_modificacion.strftime('%Y-%m-%d %H:%M:%S') if change.fecha_modificacion else 'N/A'
-            if date_key not in changes_by_date:
-                changes_by_date[date_key] = {
-                    'fecha': change.fecha_modificacion,
-                    'usuario': change.usuario,
-                    'campos': []
-                }
-            changes_by_date[date_key]['campos'].append({
-                'field_name': change.field_name,
-                'old_value': change.old_value,
-                'new_value': change.new_value
-            })
-        
-        developers_data.append({
-            'id': dev.id,
-            'name': dev.name,
-            'usuario_creacion': dev.usuario_creacion or 'N/A',
-            'fecha_creacion': dev.fecha_creacion,
-            'usuario_modificacion': dev.usuario_modificacion or 'N/A',
-            'fecha_modificacion': dev.fecha_modificacion,
-            'historial_cambios': list(changes_by_date.values())
-        })
+    ranked = select(
+        AuditHistory,
+        db.func.row_number().over(
+            partition_by=(AuditHistory.entity_type, AuditHistory.entity_id),
+            order_by=(AuditHistory.fecha_modificacion.desc(), AuditHistory.id.desc())
+        ).label('posicion')
+    ).where(or_(*conditions)).subquery()
+    change = aliased(AuditHistory, ranked)
+    changes = db.session.execute(
+        select(change).where(ranked.c.posicion <= limit_per_entity).order_by(
+            change.entity_type, change.entity_id, change.fecha_modificacion.desc(), change.id.desc()
+        )
+    ).scalars().all()
     
-    # Obtener todos los projects con información de auditoría
-    projects = Project.query.order_by(Project.fecha_creacion.desc()).all()
-    projects_data = []
-    for proj in projects:
-        # Obtener historial de cambios para este project
-        try:
-            changes = AuditHistory.query.filter_by(
-                entity_type='Project',
-                entity_id=proj.id
-            ).order_by(AuditHistory.fecha_modificacion.desc()).all()
-        except Exception:
-            # Si la tabla no existe aún, usar lista vacía
-            changes = []
-        
-        # Agrupar cambios por fecha de modificación
-        changes_by_date = {}
-        for change in changes:
-            date_key = change.fecha_modificacion.strftime('%Y-%m-%d %H:%M:%S') if change.fecha_modificacion else 'N/A'
-            if date_key not in changes_by_date:
-                changes_by_date[date_key] = {
-                    'fecha': change.fecha_modificacion,
-                    'usuario': change.usuario,
-                    'campos': []
-                }
-            changes_by_date[date_key]['campos'].append({
-                'field_name': change.field_name,
-                'old_value': change.old_value,
-                'new_value': change.new_value
-            })
-        
-        projects_data.append({
-            'id': proj.id,
-            'name': proj.name,
-            'usuario_creacion': proj.usuario_creacion or 'N/A',
-            'fecha_creacion': proj.fecha_creacion,
-            'usuario_modificacion': proj.usuario_modificacion or 'N/A',
-            'fecha_modificacion': proj.fecha_modificacion,
-            'historial_cambios': list(changes_by_date.values())
+    # Agrupar cambios por entidad y fecha de modificación
+    history = {}
+    for change in changes:
+        changes_by_date = history.setdefault((change.entity_type, change.entity_id), {})
+        date_key = change.fecha_modificacion.strftime('%Y-%m-%d %H:%M:%S') if change.fecha_modificacion else 'N/A'
+        if date_key not in changes_by_date:
+            changes_by_date[date_key] = {
+                'fecha': change.fecha_modificacion,
+                'usuario': change.usuario,
+                'campos': []
+            }
+        changes_by_date[date_key]['campos'].append({
+            'field_name': change.field_name,
+            'old_value': change.old_value,
+            'new_value': change.new_value
         })
+    return {key: list(changes_by_date.values()) for key, changes_by_date in history.items()}
+
+def get_most_active_users(user_column, limit=5):
+    """Usuarios con más registros de developers y projects en la columna indicada, agregados en SQL"""
+    from sqlalchemy import select, union_all
     
-    # Calcular estadísticas
-    total_developers = len(developers_data)
-    total_projects = len(projects_data)
-    
-    # Usuarios más activos (por creación)
-    usuarios_creacion = {}
-    usuarios_modificacion = {}
-    
-    for dev in developers_data:
-        usuario = dev['usuario_creacion']
-        if usuario != 'N/A':
-            usuarios_creacion[usuario] = usuarios_creacion.get(usuario, 0) + 1
-        usuario_mod = dev['usuario_modificacion']
-        if usuario_mod != 'N/A':
-            usuarios_modificacion[usuario_mod] = usuarios_modificacion.get(usuario_mod, 0) + 1
-    
-    for proj in projects_data:
-        usuario = proj['usuario_creacion']
-        if usuario != 'N/A':
-            usuarios_creacion[usuario] = usuarios_creacion.get(usuario, 0) + 1
-        usuario_mod = proj['usuario_modificacion']
-        if usuario_mod != 'N/A':
-            usuarios_modificacion[usuario_mod] = usuarios_modificacion.get(usuario_mod, 0) + 1
+    users = union_all(
+        select(getattr(Developer, user_column).label('usuario')).where(getattr(Developer, user_column).isnot(None)),
+        select(getattr(Project, user_column).label('usuario')).where(getattr(Project, user_column).isnot(None))
+    ).subquery()
+    total = db.func.count().label('total')
+    return db.session.execute(
+        select(users.c.usuario, total).group_by(users.c.usuario).order_by(total.desc(), users.c.usuario).limit(limit)
+    ).all()
+
+def get_latest_audit_entries(date_column, user_column, limit=5):
+    """Últimos developers y projects según date_column; cada tabla usa su índice con ORDER BY ... LIMIT"""
+    entries = []
+    for model, tipo in ((Developer, 'Developer'), (Project, 'Project')):
+        date_attr = getattr(model, date_column)
+        rows = db.session.query(model.name, date_attr, getattr(model, user_column)).filter(
+            date_attr.isnot(None)
+        ).order_by(date_attr.desc()).limit(limit).all()
+        entries.extend({
+            'tipo': tipo,
+            'nombre': name,
+            'fecha': fecha,
+            'usuario': usuario or 'N/A'
+        } for name, fecha, usuario in rows)
+    entries.sort(key=lambda x: x['fecha'], reverse=True)
+    return entries[:limit]
+
+def paginate_audit_entities(model, page):
+    """Una página de developers o projects con sus columnas de auditoría, los más recientes primero"""
+    from sqlalchemy import select
+    from sqlalchemy.orm import load_only
     
-    # Ordenar usuarios por actividad
-    usuarios_creacion_sorted = sorted(usuarios_creacion.items(), key=lambda x: x[1], reverse=True)[:5]
-    usuarios_modificacion_sorted = sorted(usuarios_modificacion.items(), key=lambda x: x[1], reverse=True)[:5]
+    query = select(model).options(load_only(
+        model.name, model.usuario_creacion, model.fecha_creacion,
+        model.usuario_modificacion, model.fecha_modificacion
+    )).order_by(model.fecha_creacion.desc(), model.id.desc())
+    return db.paginate(query, page=page, per_page=AUDIT_PAGE_SIZE, error_out=False)
+
+@app.route('/auditoria')
+def auditoria():
+    """Página de auditoría que muestra información de creación y modificación"""
+    developers_page = paginate_audit_entities(Developer, request.args.get('dev_page', 1, type=int))
+    projects_page = paginate_audit_entities(Project, request.args.get('proj_page', 1, type=int))
     
-    # Últimos creados (top 5)
-    ultimos_creados = []
-    for dev in developers_data[:5]:
-        if dev['fecha_creacion']:
-            ultimos_creados.append({
-                'tipo': 'Developer',
-                'nombre': dev['name'],
-                'fecha': dev['fecha_creacion'],
-                'usuario': dev['usuario_creacion']
-            })
-    for proj in projects_data[:5]:
-        if proj['fecha_creacion']:
-            ultimos_creados.append({
-                'tipo': 'Project',
-                'nombre': proj['name'],
-                'fecha': proj['fecha_creacion'],
-                'usuario': proj['usuario_creacion']
-            })
-    ultimos_creados.sort(key=lambda x: x['fecha'], reverse=True)
-    ultimos_creados = ultimos_creados[:5]
+    # Historial de los registros de ambas páginas en una sola consulta
+    history = get_audit_history({
+        'Developer': [dev.id for dev in developers_page.items],
+        'Project': [proj.id for proj in projects_page.items]
+    })
     
-    # Últimos modificados (top 5)
-    ultimos_modificados = []
-    for dev in developers_data:
-        if dev['fecha_modificacion']:
-            ultimos_modificados.append({
-                'tipo': 'Developer',
-                'nombre': dev['name'],
-                'fecha': dev['fecha_modificacion'],
-                'usuario': dev['usuario_modificacion']
-            })
-    for proj in projects_data:
-        if proj['fecha_modificacion']:
-            ultimos_modificados.append({
-                'tipo': 'Project',
-                'nombre': proj['name'],
-                'fecha': proj['fecha_modificacion'],
-                'usuario': proj['usuario_modificacion']
-            })
-    ultimos_modificados.sort(key=lambda x: x['fecha'], reverse=True)
-    ultimos_modificados = ultimos_modificados[:5]
+    def audit_row(entity, entity_type):
+        return {
+            'id': entity.id,
+            'name': entity.name,
+            'usuario_creacion': entity.usuario_creacion or 'N/A',
+            'fecha_creacion': entity.fecha_creacion,
+            'usuario_modificacion': entity.usuario_modificacion or 'N/A',
+            'fecha_modificacion': entity.fecha_modificacion,
+            'historial_cambios': history.get((entity_type, entity.id), [])
+        }
     
     return render_template('auditoria.html',
-                         developers=developers_data,
-                         projects=projects_data,
-                         total_developers=total_developers,
-                         total_projects=total_projects,
-                         usuarios_creacion=usuarios_creacion_sorted,
-                         usuarios_modificacion=usuarios_modificacion_sorted,
-                         ultimos_creados=ultimos_creados,
-                         ultimos_modificados=ultimos_modificados)
+                         developers=[audit_row(dev, 'Developer') for dev in developers_page.items],
+                         projects=[audit_row(proj, 'Project') for proj in projects_page.items],
+                         developers_page=developers_page,
+                         projects_page=projects_page,
+                         total_developers=developers_page.total,
+                         total_projects=projects_page.total,
+                         usuarios_creacion=get_most_active_users('usuario_creacion'),
+                         usuarios_modificacion=get_most_active_users('usuario_modificacion'),
+                         ultimos_creados=get_latest_audit_entries('fecha_creacion', 'usuario_creacion'),
+                         ultimos_modificados=get_latest_audit_entries('fecha_modificacion', 'usuario_modificacion'))
 
 if __name__ == '__main__':
     print("🚀 Starting DevMatch AI Flask Server...")
@@ -0,0 +1,223 @@
+# ============================================================
+# DevMatch AI - Particiones Mensuales y Archivado del Historial de Auditoría
+# ============================================================
+#
+# En PostgreSQL audit_history puede convertirse (migrate_audit_partitions.py)
+# en una tabla particionada por rango de fecha_modificacion, una partición
+# por mes: audit_history_y2025m01, audit_history_y2025m02, ... más una
+# partición DEFAULT. Archivar un mes exporta sus filas a un JSONL comprimido
+# y elimina la partición completa con DROP TABLE, sin DELETE masivo ni VACUUM.
+# En SQLite (o si la tabla no está particionada) audit_history sigue siendo
+# una tabla normal y el archivado borra las filas del mes.
+
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+# Meses de historial que se conservan en la base de datos
+AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '12'))
+
+# Meses futuros para los que se crean particiones por adelantado
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv('AUDIT_PARTITION_MONTHS_AHEAD', '3'))
+
+# Carpeta donde se guardan los meses archivados
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', 'audit_archive')
+
+# Partición que recibe las filas sin partición mensual (creada por migrate_audit_partitions.py)
+DEFAULT_PARTITION = 'audit_history_default'
+
+AUDIT_COLUMNS = ('id', 'entity_type', 'entity_id', 'field_name', 'old_value', 'new_value',
+                 'usuario', 'fecha_modificacion')
+
+
+def month_start(value):
+    """Primer día del mes de una fecha"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    """Primer día del mes que está `months` meses después (o antes, si es negativo)"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Nombre de la partición de un mes, p. ej. audit_history_y2025m03"""
+    return f"audit_history_y{month.year}m{month.month:02d}"
+
+
+def is_postgresql(connection):
+    return connection.dialect.name == 'postgresql'
+
+
+def is_partitioned(connection):
+    """True si audit_history es una tabla particionada de PostgreSQL"""
+    if not is_postgresql(connection):
+        return False
+    return bool(connection.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = to_regclass('audit_history')
+        )
+    """)).scalar())
+
+
+def table_exists(connection, name):
+    return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def partition_exists(connection, month):
+    return table_exists(connection, partition_name(month))
+
+
+def create_partition(connection, month):
+    """
+    Crea la partición de un mes si no existe. PostgreSQL no permite crearla si la
+    partición DEFAULT ya tiene filas de ese mes: esas filas se sacan de DEFAULT y se
+    vuelven a insertar en la nueva partición, en la misma transacción.
+    Devuelve el número de filas movidas.
+    """
+    month_range = "fecha_modificacion >= :start AND fecha_modificacion < :end"
+    params = {"start": month, "end": add_months(month, 1)}
+
+    moved = 0
+    if table_exists(connection, DEFAULT_PARTITION):
+        moved = connection.execute(
+            text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION} WHERE {month_range}"), params
+        ).scalar()
+    if moved:
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE audit_history_moving AS SELECT * FROM {DEFAULT_PARTITION} WHERE {month_range}"
+        ), params)
+        connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {month_range}"), params)
+
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF audit_history "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+
+    if moved:
+        connection.execute(text("INSERT INTO audit_history SELECT * FROM audit_history_moving"))
+        connection.execute(text("DROP TABLE audit_history_moving"))
+    return moved
+
+
+def ensure_partitions(connection, first_month=None, months_ahead=AUDIT_PARTITION_MONTHS_AHEAD):
+    """
+    Crea las particiones desde first_month (por defecto el mes actual) hasta
+    months_ahead meses en el futuro. Devuelve los meses creados; no hace nada
+    si audit_history no está particionada.
+    """
+    if not is_partitioned(connection):
+        return []
+    current = month_start(datetime.now())
+    month = first_month or current
+    created = []
+    while month <= add_months(current, months_ahead):
+        if not partition_exists(connection, month):
+            create_partition(connection, month)
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def oldest_month(connection):
+    """Mes del registro de auditoría más antiguo, o None si no hay registros"""
+    oldest = connection.execute(text("SELECT MIN(fecha_modificacion) FROM audit_history")).scalar()
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+    return month_start(oldest) if oldest else None
+
+
+def _serialize(row):
+    return {
+        column: value.isoformat() if isinstance(value, datetime) else value
+        for column, value in row.items()
+    }
+
+
+def _publish_archive(partial_path, directory, month):
+    """
+    Da el nombre final a un archivo terminado sin sobrescribir nunca uno anterior:
+    si el mes ya fue archivado (p. ej. llegaron filas tarde), se usa
+    audit_history_yYYYYmMM.part2.jsonl.gz, .part3, ... Devuelve la ruta final.
+    """
+    part = 1
+    while True:
+        suffix = f".part{part}" if part > 1 else ""
+        path = os.path.join(directory, f"{partition_name(month)}{suffix}.jsonl.gz")
+        try:
+            # link() falla si el destino existe, a diferencia de replace()
+            os.link(partial_path, path)
+        except FileExistsError:
+            part += 1
+            continue
+        os.remove(partial_path)
+        return path
+
+
+def export_month(connection, month, directory=AUDIT_ARCHIVE_DIR):
+    """
+    Escribe las filas de un mes en <directory>/audit_history_yYYYYmMM.jsonl.gz
+    (o en un archivo .partN si el mes ya tenía archivo). El archivo se escribe con
+    otro nombre y se renombra al terminar, de modo que un archivo con el nombre
+    final siempre está completo. Devuelve (ruta, filas); los meses sin filas no
+    generan archivo (ruta None).
+    """
+    os.makedirs(directory, exist_ok=True)
+    partial_path = os.path.join(directory, f"{partition_name(month)}.jsonl.gz.partial")
+
+    rows = connection.execution_options(stream_results=True).execute(
+        text(f"""
+            SELECT {', '.join(AUDIT_COLUMNS)} FROM audit_history
+            WHERE fecha_modificacion >= :start AND fecha_modificacion < :end
+            ORDER BY fecha_modificacion, id
+        """),
+        {"start": month, "end": add_months(month, 1)}
+    ).mappings()
+
+    count = 0
+    with open(partial_path, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as archive:
+            for row in rows:
+                archive.write(json.dumps(_serialize(row), ensure_ascii=False) + '\n')
+                count += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    if not count:
+        os.remove(partial_path)
+        return None, 0
+    return _publish_archive(partial_path, directory, month), count
+
+
+def drop_month(connection, month):
+    """Elimina un mes archivado: DROP de su partición y DELETE de las filas que queden (p. ej. en DEFAULT)"""
+    if is_partitioned(connection) and partition_exists(connection, month):
+        connection.execute(text(f"DROP TABLE {partition_name(month)}"))
+    connection.execute(
+        text("DELETE FROM audit_history WHERE fecha_modificacion >= :start AND fecha_modificacion < :end"),
+        {"start": month, "end": add_months(month, 1)}
+    )
+
+
+def archive_old_months(engine, retention_months=AUDIT_RETENTION_MONTHS, directory=AUDIT_ARCHIVE_DIR):
+    """
+    Archiva y elimina cada mes anterior a la ventana de retención.
+    Cada mes va en su propia transacción y solo se elimina después de escribir su archivo.
+    Devuelve [(mes, ruta, filas)].
+    """
+    cutoff = add_months(month_start(datetime.now()), -retention_months)
+    with engine.connect() as connection:
+        month = oldest_month(connection)
+
+    archived = []
+    while month and month < cutoff:
+        with engine.begin() as connection:
+            path, count = export_month(connection, month, directory)
+            drop_month(connection, month)
+        archived.append((month, path, count))
+        month = add_months(month, 1)
+    return archived
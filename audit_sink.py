@@ -0,0 +1,131 @@
+# ============================================================
+# DevMatch AI - Escritor Asíncrono y por Lotes del Historial de Auditoría
+# ============================================================
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+# Escribir la auditoría en segundo plano después del commit (por defecto se escribe en el mismo flush)
+AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
+# Registros por INSERT y segundos máximos que un registro espera en el buffer
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+
+# Capacidad de la cola y segundos que espera un escritor cuando está llena
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_QUEUE_TIMEOUT = float(os.getenv('AUDIT_QUEUE_TIMEOUT', '0.5'))
+
+# Reintentos de un INSERT fallido por errores de conexión y segundos antes del primero
+# (se duplican en cada intento hasta AUDIT_RETRY_MAX_DELAY)
+AUDIT_WRITE_RETRIES = int(os.getenv('AUDIT_WRITE_RETRIES', '10'))
+AUDIT_RETRY_DELAY = float(os.getenv('AUDIT_RETRY_DELAY', '0.5'))
+AUDIT_RETRY_MAX_DELAY = float(os.getenv('AUDIT_RETRY_MAX_DELAY', '30'))
+
+
+class AuditSink:
+    """Cola acotada de registros de auditoría que un hilo inserta en lotes"""
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                 queue_size=AUDIT_QUEUE_SIZE, queue_timeout=AUDIT_QUEUE_TIMEOUT,
+                 write_retries=AUDIT_WRITE_RETRIES, retry_delay=AUDIT_RETRY_DELAY,
+                 retry_max_delay=AUDIT_RETRY_MAX_DELAY):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_timeout = queue_timeout
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+                    self._thread.start()
+
+    def submit(self, engine, table, rows):
+        """
+        Encola registros ya confirmados. Si la cola sigue llena tras AUDIT_QUEUE_TIMEOUT,
+        el llamador los escribe directamente y espera hasta que se guarden
+        (back-pressure en lugar de perderlos).
+        """
+        self._ensure_started()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put((engine, table, row), timeout=self.queue_timeout)
+            except queue.Full:
+                self._write(engine, table, rows[index:])
+                return
+
+    def _run(self):
+        """Hilo escritor: agrupa registros hasta batch_size o flush_interval"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch):
+        """Un INSERT por cada combinación de engine y tabla del lote"""
+        groups = {}
+        for engine, table, row in batch:
+            groups.setdefault((engine, table), []).append(row)
+        for (engine, table), rows in groups.items():
+            self._write(engine, table, rows)
+
+    def _write(self, engine, table, rows):
+        """
+        Inserta los registros, reintentando con espera creciente mientras la base de datos
+        no esté disponible. Si no se pueden guardar (la base de datos los rechaza o se
+        agotan los reintentos) se escriben completos en el log para poder recuperarlos.
+        """
+        delay = self.retry_delay
+        for attempt in range(self.write_retries + 1):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(table.insert(), rows)
+                return
+            except (OperationalError, InterfaceError) as e:
+                error = e
+                if attempt == self.write_retries:
+                    break
+                print(f"❌ Error escribiendo {len(rows)} registros de auditoría, reintento en {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.retry_max_delay)
+            except Exception as e:
+                error = e
+                break
+
+        print(f"❌ No se pudieron escribir {len(rows)} registros de auditoría: {error}")
+        for row in rows:
+            print(f"   {json.dumps(row, default=str, ensure_ascii=False)}")
+
+    def flush(self):
+        """Espera a que se escriban todos los registros encolados"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+
+audit_sink = AuditSink()
+
+# No perder los registros pendientes al cerrar el proceso
+atexit.register(audit_sink.flush)
@@ -2,9 +2,14 @@
 # DevMatch AI - Database Initialization and Data Migration
 # ============================================================
 
-from models import db, Project, Developer, Technology, Experience, MatchResult, AuditHistory
+from models import db, Project, Developer, Technology, Experience, MatchResult, MatchSummary
 from initial_data import projects as old_projects, developers as old_developers
+from ranking import RANKING_WEIGHTS
+from sqlalchemy import and_, case, delete, event, func, insert, select
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
+from functools import reduce
+import operator
 import os
 
 def init_database(app):
@@ -125,14 +130,22 @@ def migrate_data():
 
 def get_all_projects():
     """Get all projects from database"""
-    projects = Project.query.all()
+    projects = Project.with_relations().all()
     return [project.to_dict() for project in projects]
 
 def get_all_developers():
     """Get all developers from database"""
-    developers = Developer.query.all()
+    developers = Developer.with_relations().all()
     return [developer.to_dict() for developer in developers]
 
+def get_developers_by_ids(developer_ids):
+    """Get the developers with the given IDs, in the same order"""
+    if not developer_ids:
+        return []
+    developers = Developer.with_relations().filter(Developer.id.in_(developer_ids)).all()
+    by_id = {developer.id: developer for developer in developers}
+    return [by_id[developer_id].to_dict() for developer_id in developer_ids if developer_id in by_id]
+
 def get_project_by_id(project_id):
     """Get a specific project by ID"""
     project = Project.query.get(project_id)
@@ -152,45 +165,218 @@ def calculate_match_db(project_dict, developer_dict):
         return 0
     return (len(matches) / len(required)) * 100
 
-def save_match_result(project_id, developer_id, technical_match, ai_analysis):
-    """Save match result to database"""
+# Rows per INSERT statement, kept well below SQLite's bound parameter limit
+MATCH_UPSERT_CHUNK_SIZE = 500
+
+# Keep the per-project match_summaries table up to date and read statistics from it
+MATCH_SUMMARY_ENABLED = os.getenv('MATCH_SUMMARY_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+# Lower bounds of the score histogram buckets: [0, 20), [20, 40), [40, 60), [60, 80), [80, 100]
+SCORE_BUCKETS = (0, 20, 40, 60, 80)
+
+def combined_score_column(weights=None):
+    """
+    SQL expression of the combined score: weighted average of the four components
+    with ranking.RANKING_WEIGHTS, like ranking.combined_scores().
+    Saved match_summaries keep the weights they were built with: run
+    rebuild-match-summaries after changing RANKING_WEIGHTS.
+    """
+    weights = RANKING_WEIGHTS if weights is None else weights
+    components = [
+        MatchResult.technical_match,
+        func.coalesce(MatchResult.ai_technical_affinity, 0),
+        func.coalesce(MatchResult.ai_motivational_affinity, 0),
+        func.coalesce(MatchResult.ai_experience_relevance, 0)
+    ]
+    terms = [component * float(weight / weights.sum())
+             for component, weight in zip(components, weights) if weight]
+    return reduce(operator.add, terms)
+
+def _bucket_counts(score, prefix):
+    """One SUM(CASE ...) column per histogram bucket of score"""
+    columns = []
+    for index, lower in enumerate(SCORE_BUCKETS):
+        conditions = []
+        if index:
+            conditions.append(score >= lower)
+        if index < len(SCORE_BUCKETS) - 1:
+            conditions.append(score < SCORE_BUCKETS[index + 1])
+        condition = and_(*conditions)
+        columns.append(func.coalesce(func.sum(case((condition, 1), else_=0)), 0).label(f'{prefix}_bucket_{index}'))
+    return columns
+
+def _histogram(row, prefix):
+    """[{'range': '0-20', 'count': n}, ...] from the bucket columns of an aggregate row"""
+    upper_bounds = SCORE_BUCKETS[1:] + (100,)
+    return [
+        {'range': f'{lower}-{upper}', 'count': int(getattr(row, f'{prefix}_bucket_{index}') or 0)}
+        for index, (lower, upper) in enumerate(zip(SCORE_BUCKETS, upper_bounds))
+    ]
+
+def refresh_match_summaries(project_ids):
+    """
+    Recompute the match_summaries rows of the given projects from match_results.
+    Runs in the caller's transaction; each project only reads its own rows through
+    the (project_id, technical_match) index.
+    """
+    project_ids = list(set(project_ids))
+    if not project_ids:
+        return
+    aggregates = select(
+        MatchResult.project_id,
+        func.count(MatchResult.id),
+        func.sum(MatchResult.technical_match),
+        func.sum(combined_score_column()),
+        func.coalesce(func.sum(MatchResult.ai_technical_affinity), 0),
+        func.count(MatchResult.ai_technical_affinity),
+        func.coalesce(func.sum(MatchResult.ai_motivational_affinity), 0),
+        func.count(MatchResult.ai_motivational_affinity),
+        func.coalesce(func.sum(MatchResult.ai_experience_relevance), 0),
+        func.count(MatchResult.ai_experience_relevance),
+        *_bucket_counts(MatchResult.technical_match, 'technical'),
+        *_bucket_counts(combined_score_column(), 'combined')
+    ).where(MatchResult.project_id.in_(project_ids)).group_by(MatchResult.project_id)
+    
+    columns = [
+        'project_id', 'match_count', 'technical_sum', 'combined_sum',
+        'ai_technical_sum', 'ai_technical_count',
+        'ai_motivational_sum', 'ai_motivational_count',
+        'ai_experience_sum', 'ai_experience_count',
+        *[f'technical_bucket_{index}' for index in range(len(SCORE_BUCKETS))],
+        *[f'combined_bucket_{index}' for index in range(len(SCORE_BUCKETS))]
+    ]
+    
+    # Projects left without any result lose their summary row
+    db.session.execute(delete(MatchSummary).where(
+        MatchSummary.project_id.in_(project_ids),
+        ~select(MatchResult.id).where(MatchResult.project_id == MatchSummary.project_id).exists()
+    ))
+    
+    # Upsert so concurrent saves for the same project can't collide on the primary key
+    upsert_insert = _upsert_insert(db.session.get_bind().dialect.name)
+    if upsert_insert:
+        statement = upsert_insert(MatchSummary).from_select(columns, aggregates)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['project_id'],
+            set_={column: statement.excluded[column] for column in columns[1:]}
+        ))
+    else:
+        db.session.execute(delete(MatchSummary).where(MatchSummary.project_id.in_(project_ids)))
+        db.session.execute(insert(MatchSummary).from_select(columns, aggregates))
+
+@event.listens_for(Session, 'after_flush')
+def refresh_summaries_of_deleted_matches(session, flush_context):
+    """MatchResult rows deleted through the ORM (e.g. by delete_project.py) also leave their summaries"""
+    if not MATCH_SUMMARY_ENABLED:
+        return
+    project_ids = {obj.project_id for obj in session.deleted if isinstance(obj, MatchResult)}
+    if project_ids:
+        refresh_match_summaries(project_ids)
+
+def _match_result_values(row, created_at):
+    """Column values of a match_results row from a {project_id, developer_id, technical_match, ai_analysis} dict"""
+    ai_analysis = row.get('ai_analysis') or {}
+    return {
+        'project_id': row['project_id'],
+        'developer_id': row['developer_id'],
+        'technical_match': row['technical_match'],
+        'ai_technical_affinity': ai_analysis.get('technical_affinity', 0),
+        'ai_motivational_affinity': ai_analysis.get('motivational_affinity', 0),
+        'ai_experience_relevance': ai_analysis.get('experience_relevance', 0),
+        'ai_comment': ai_analysis.get('comment', ''),
+        'created_at': created_at,
+        'is_stale': False
+    }
+
+def _upsert_insert(dialect_name):
+    """Dialect insert() that supports ON CONFLICT DO UPDATE, or None if the dialect has none"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def rebuild_match_summaries():
+    """Rebuild match_summaries for every project (run once after enabling MATCH_SUMMARY_ENABLED)"""
     try:
-        # Check if a match result already exists for this project-developer pair
-        existing = MatchResult.query.filter_by(
-            project_id=project_id,
-            developer_id=developer_id
-        ).first()
-        
-        if existing:
-            # Update existing result
-            existing.technical_match = technical_match
-            existing.ai_technical_affinity = ai_analysis.get('technical_affinity', 0)
-            existing.ai_motivational_affinity = ai_analysis.get('motivational_affinity', 0)
-            existing.ai_experience_relevance = ai_analysis.get('experience_relevance', 0)
-            existing.ai_comment = ai_analysis.get('comment', '')
-            existing.created_at = datetime.now().isoformat()
+        project_ids = db.session.execute(select(MatchResult.project_id).distinct()).scalars().all()
+        MatchSummary.query.delete()
+        refresh_match_summaries(project_ids)
+        db.session.commit()
+        print(f"✅ Match summaries rebuilt for {len(project_ids)} projects")
+        return True
+    except Exception as e:
+        print(f"❌ Error rebuilding match summaries: {e}")
+        db.session.rollback()
+        return False
+
+def save_match_results(rows):
+    """
+    Save many match results in one transaction.
+    Each row is a dict with project_id, developer_id, technical_match and ai_analysis.
+    Uses INSERT ... ON CONFLICT (project_id, developer_id) DO UPDATE on PostgreSQL and SQLite.
+    Returns the number of rows written (degraded analyses are skipped), 0 on error.
+    """
+    created_at = datetime.now()
+    
+    # The last row wins when a batch repeats a pair (ON CONFLICT cannot touch a row twice).
+    # Degraded (heuristic) analyses are not AI results: they are shown but never saved.
+    values = {}
+    for row in rows:
+        if (row.get('ai_analysis') or {}).get('degraded'):
+            continue
+        values[(row['project_id'], row['developer_id'])] = _match_result_values(row, created_at)
+    values = list(values.values())
+    if not values:
+        return 0
+    
+    try:
+        upsert_insert = _upsert_insert(db.session.get_bind().dialect.name)
+        if upsert_insert:
+            for start in range(0, len(values), MATCH_UPSERT_CHUNK_SIZE):
+                statement = upsert_insert(MatchResult).values(values[start:start + MATCH_UPSERT_CHUNK_SIZE])
+                db.session.execute(statement.on_conflict_do_update(
+                    index_elements=['project_id', 'developer_id'],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in values[0] if column not in ('project_id', 'developer_id')
+                    }
+                ))
         else:
-            # Create new result
-            match_result = MatchResult(
-                project_id=project_id,
-                developer_id=developer_id,
-                technical_match=technical_match,
-                ai_technical_affinity=ai_analysis.get('technical_affinity', 0),
-                ai_motivational_affinity=ai_analysis.get('motivational_affinity', 0),
-                ai_experience_relevance=ai_analysis.get('experience_relevance', 0),
-                ai_comment=ai_analysis.get('comment', ''),
-                created_at=datetime.now().isoformat()
-            )
-            db.session.add(match_result)
+            # Other databases: update or insert each pair, still in a single transaction
+            for value in values:
+                existing = MatchResult.query.filter_by(
+                    project_id=value['project_id'],
+                    developer_id=value['developer_id']
+                ).first()
+                if existing:
+                    for column, column_value in value.items():
+                        setattr(existing, column, column_value)
+                else:
+                    db.session.add(MatchResult(**value))
+        
+        if MATCH_SUMMARY_ENABLED:
+            refresh_match_summaries(value['project_id'] for value in values)
         
         db.session.commit()
-        print(f"✅ Match result saved: Project {project_id} - Developer {developer_id}")
-        return True
+        print(f"✅ {len(values)} match results saved")
+        return len(values)
         
     except Exception as e:
-        print(f"❌ Error saving match result: {e}")
+        print(f"❌ Error saving match results: {e}")
         db.session.rollback()
-        return False
+        return 0
+
+def save_match_result(project_id, developer_id, technical_match, ai_analysis):
+    """Save match result to database"""
+    return save_match_results([{
+        'project_id': project_id,
+        'developer_id': developer_id,
+        'technical_match': technical_match,
+        'ai_analysis': ai_analysis
+    }])
 
 def get_match_results():
     """Get all match results from database"""
@@ -210,6 +396,81 @@ def get_match_results_for_project(project_id):
         print(f"❌ Error getting match results for project {project_id}: {e}")
         return []
 
+def get_saved_matches_for_project(project_id):
+    """Get saved matches for a project in the same shape used by the matching views"""
+    try:
+        results = MatchResult.query.options(
+            selectinload(MatchResult.developer).selectinload(Developer.skills),
+            selectinload(MatchResult.developer).selectinload(Developer.experiences)
+        ).filter_by(project_id=project_id).all()
+        return [
+            {
+                "developer": result.developer.to_dict(),
+                "technical_match": result.technical_match,
+                "is_stale": result.is_stale,
+                "ai_analysis": {
+                    "technical_affinity": result.ai_technical_affinity or 0,
+                    "motivational_affinity": result.ai_motivational_affinity or 0,
+                    "experience_relevance": result.ai_experience_relevance or 0,
+                    "comment": result.ai_comment or ''
+                }
+            } for result in results if result.developer
+        ]
+    except Exception as e:
+        print(f"❌ Error getting saved matches for project {project_id}: {e}")
+        return []
+
+def get_projects_with_matches():
+    """
+    Get every project with its saved matches, match count and average score.
+    Uses a fixed number of queries regardless of how many projects and matches exist.
+    """
+    # Match count and average combined score per project, aggregated in SQL
+    combined_score = combined_score_column()
+    aggregates = {
+        row.project_id: row
+        for row in db.session.query(
+            MatchResult.project_id,
+            func.count(MatchResult.id).label('match_count'),
+            func.avg(combined_score).label('average_score')
+        ).join(Developer, Developer.id == MatchResult.developer_id).group_by(MatchResult.project_id)
+    }
+    
+    # Saved matches with the developer columns the views need, in one joined query
+    matches_by_project = {}
+    rows = db.session.query(
+        MatchResult, Developer.name, Developer.experience_level
+    ).join(Developer, Developer.id == MatchResult.developer_id).order_by(
+        MatchResult.project_id, MatchResult.technical_match.desc()
+    ).all()
+    for match_result, developer_name, developer_level in rows:
+        matches_by_project.setdefault(match_result.project_id, []).append({
+            "match_result": match_result,
+            "developer": {
+                "id": match_result.developer_id,
+                "name": developer_name,
+                "experience_level": developer_level
+            },
+            "technical_match": match_result.technical_match,
+            "ai_technical_affinity": match_result.ai_technical_affinity,
+            "ai_motivational_affinity": match_result.ai_motivational_affinity,
+            "ai_experience_relevance": match_result.ai_experience_relevance,
+            "ai_comment": match_result.ai_comment,
+            "created_at": match_result.created_at
+        })
+    
+    projects = Project.with_relations().all()
+    projects_data = []
+    for project in projects:
+        aggregate = aggregates.get(project.id)
+        projects_data.append({
+            "project": project.to_dict(),
+            "matches": matches_by_project.get(project.id, []),
+            "match_count": aggregate.match_count if aggregate else 0,
+            "average_score": float(aggregate.average_score or 0) if aggregate else 0
+        })
+    return projects_data
+
 def get_match_results_for_developer(developer_id):
     """Get match results for a specific developer"""
     try:
@@ -223,6 +484,7 @@ def clear_old_match_results():
     """Clear all match results (useful for regenerating results)"""
     try:
         MatchResult.query.delete()
+        MatchSummary.query.delete()
         db.session.commit()
         print("✅ All match results cleared")
         return True
@@ -231,33 +493,86 @@ def clear_old_match_results():
         db.session.rollback()
         return False
 
+def get_best_technical_matches(limit=3):
+    """Best technical matches with project and developer names, read through the technical_match index"""
+    rows = db.session.query(
+        MatchResult.project_id, MatchResult.developer_id, MatchResult.technical_match,
+        Project.name, Developer.name
+    ).outerjoin(Project, Project.id == MatchResult.project_id).outerjoin(
+        Developer, Developer.id == MatchResult.developer_id
+    ).order_by(MatchResult.technical_match.desc()).limit(limit).all()
+    return [
+        {
+            'project_id': project_id,
+            'developer_id': developer_id,
+            'technical_match': technical_match,
+            'project_name': project_name or 'Unknown',
+            'developer_name': developer_name or 'Unknown'
+        } for project_id, developer_id, technical_match, project_name, developer_name in rows
+    ]
+
+def _summary_statistics():
+    """Statistics summed over match_summaries (one row per project)"""
+    def average(total, count):
+        return float(total or 0) / count if count else 0
+    
+    row = db.session.query(
+        func.coalesce(func.sum(MatchSummary.match_count), 0).label('total_matches'),
+        func.sum(MatchSummary.technical_sum).label('technical_sum'),
+        func.sum(MatchSummary.combined_sum).label('combined_sum'),
+        func.sum(MatchSummary.ai_technical_sum).label('ai_technical_sum'),
+        func.sum(MatchSummary.ai_technical_count).label('ai_technical_count'),
+        func.sum(MatchSummary.ai_motivational_sum).label('ai_motivational_sum'),
+        func.sum(MatchSummary.ai_motivational_count).label('ai_motivational_count'),
+        func.sum(MatchSummary.ai_experience_sum).label('ai_experience_sum'),
+        func.sum(MatchSummary.ai_experience_count).label('ai_experience_count'),
+        *[func.sum(getattr(MatchSummary, f'technical_bucket_{index}')).label(f'technical_bucket_{index}')
+          for index in range(len(SCORE_BUCKETS))],
+        *[func.sum(getattr(MatchSummary, f'combined_bucket_{index}')).label(f'combined_bucket_{index}')
+          for index in range(len(SCORE_BUCKETS))]
+    ).one()
+    total_matches = int(row.total_matches)
+    return row, {
+        'total_matches': total_matches,
+        'average_technical_score': average(row.technical_sum, total_matches),
+        'average_combined_score': average(row.combined_sum, total_matches),
+        'average_ai_technical': average(row.ai_technical_sum, row.ai_technical_count),
+        'average_ai_motivational': average(row.ai_motivational_sum, row.ai_motivational_count),
+        'average_ai_experience': average(row.ai_experience_sum, row.ai_experience_count),
+    }
+
+def _table_statistics():
+    """Statistics aggregated over match_results in a single query"""
+    row = db.session.query(
+        func.count(MatchResult.id).label('total_matches'),
+        func.avg(MatchResult.technical_match).label('average_technical_score'),
+        func.avg(combined_score_column()).label('average_combined_score'),
+        func.avg(MatchResult.ai_technical_affinity).label('average_ai_technical'),
+        func.avg(MatchResult.ai_motivational_affinity).label('average_ai_motivational'),
+        func.avg(MatchResult.ai_experience_relevance).label('average_ai_experience'),
+        *_bucket_counts(MatchResult.technical_match, 'technical'),
+        *_bucket_counts(combined_score_column(), 'combined')
+    ).one()
+    return row, {
+        'total_matches': row.total_matches,
+        'average_technical_score': float(row.average_technical_score or 0),
+        'average_combined_score': float(row.average_combined_score or 0),
+        'average_ai_technical': float(row.average_ai_technical or 0),
+        'average_ai_motivational': float(row.average_ai_motivational or 0),
+        'average_ai_experience': float(row.average_ai_experience or 0),
+    }
+
 def get_match_statistics():
-    """Get statistics about saved matches"""
+    """
+    Get statistics about saved matches: counts, averages, best technical matches and
+    score histograms. Reads match_summaries when MATCH_SUMMARY_ENABLED, otherwise
+    aggregates match_results in SQL.
+    """
     try:
-        total_matches = MatchResult.query.count()
-        
-        # Best technical matches
-        best_technical = MatchResult.query.order_by(MatchResult.technical_match.desc()).limit(3).all()
-        
-        # Best overall AI scores (average of AI metrics)
-        high_ai_scores = db.session.query(MatchResult).all()
-        
-        stats = {
-            'total_matches': total_matches,
-            'best_technical_matches': [
-                {
-                    'project_id': match.project_id,
-                    'developer_id': match.developer_id,
-                    'technical_match': match.technical_match,
-                    'project_name': match.project.name if match.project else 'Unknown',
-                    'developer_name': match.developer.name if match.developer else 'Unknown'
-                } for match in best_technical
-            ],
-            'average_technical_score': db.session.query(db.func.avg(MatchResult.technical_match)).scalar() or 0,
-            'average_ai_technical': db.session.query(db.func.avg(MatchResult.ai_technical_affinity)).scalar() or 0,
-            'average_ai_motivational': db.session.query(db.func.avg(MatchResult.ai_motivational_affinity)).scalar() or 0,
-        }
-        
+        row, stats = _summary_statistics() if MATCH_SUMMARY_ENABLED else _table_statistics()
+        stats['best_technical_matches'] = get_best_technical_matches()
+        stats['technical_histogram'] = _histogram(row, 'technical')
+        stats['combined_histogram'] = _histogram(row, 'combined')
         return stats
     except Exception as e:
         print(f"❌ Error getting match statistics: {e}")
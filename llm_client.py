@@ -0,0 +1,285 @@
+# ============================================================
+# DevMatch AI - Shared Ollama HTTP Client
+# ============================================================
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+# Ollama server and model configuration
+OLLAMA_HOST = os.getenv('OLLAMA_HOST', 'localhost')
+OLLAMA_PORT = os.getenv('OLLAMA_PORT', '11434')
+OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'deepseek-r1:1.5b')
+
+# Timeouts in seconds: connecting to the server and waiting for the generation
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '5'))
+OLLAMA_READ_TIMEOUT = float(os.getenv('OLLAMA_READ_TIMEOUT', '60'))
+
+# Total seconds a streamed generation may take: the read timeout only bounds the gap between tokens
+OLLAMA_GENERATION_TIMEOUT = float(os.getenv('OLLAMA_GENERATION_TIMEOUT', str(OLLAMA_READ_TIMEOUT)))
+
+# How long Ollama keeps the model loaded after a request (e.g. "30m", "-1" = forever)
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+
+# Maximum number of pooled keep-alive connections to the server
+OLLAMA_POOL_SIZE = int(os.getenv('OLLAMA_POOL_SIZE', '10'))
+
+# Requests the Ollama server processes in parallel (same as the server's OLLAMA_NUM_PARALLEL)
+OLLAMA_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+
+# Circuit breaker: open when at least LLM_BREAKER_MIN_CALLS calls in the last LLM_BREAKER_WINDOW
+# seconds failed at a rate of LLM_BREAKER_FAILURE_RATE or more, then fail fast for
+# LLM_BREAKER_OPEN_SECONDS before letting a single probe call through
+LLM_BREAKER_WINDOW = float(os.getenv('LLM_BREAKER_WINDOW', '60'))
+LLM_BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', '5'))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5'))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))
+
+
+class LLMUnavailableError(Exception):
+    """Raised without calling the server while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker.
+    closed: calls go through and their outcomes are tracked over a sliding time window.
+    open: calls fail immediately with LLMUnavailableError until the open period ends.
+    half-open: one probe call goes through; success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, window=LLM_BREAKER_WINDOW, min_calls=LLM_BREAKER_MIN_CALLS,
+                 failure_rate=LLM_BREAKER_FAILURE_RATE, open_seconds=LLM_BREAKER_OPEN_SECONDS):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._outcomes = deque()  # (timestamp, succeeded)
+
+    def before_call(self):
+        """Let a call through or raise LLMUnavailableError"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise LLMUnavailableError(f"LLM server unavailable, retrying in {remaining:.0f}s")
+                self._state = self.HALF_OPEN
+            # Half-open: only one probe at a time
+            if self._probing:
+                raise LLMUnavailableError("LLM server unavailable, a probe call is in progress")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._probing = False
+                self._outcomes.clear()
+                print("✅ LLM circuit breaker closed")
+                return
+            self._record(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._record(False)
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def _record(self, succeeded):
+        """Track an outcome and forget the ones older than the window (caller must hold the lock)"""
+        now = time.monotonic()
+        self._outcomes.append((now, succeeded))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self):
+        """Start rejecting calls (caller must hold the lock)"""
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._outcomes.clear()
+        print(f"❌ LLM circuit breaker opened for {self.open_seconds:.0f}s")
+
+
+class JSONStreamScanner:
+    """
+    Incremental scan of generated text for the first complete JSON value.
+    Reasoning blocks (<think>...</think>, as written by deepseek-r1) are skipped, and
+    brackets inside JSON strings are ignored while tracking the nesting depth.
+    """
+
+    THINK_OPEN = '<think>'
+    THINK_CLOSE = '</think>'
+
+    def __init__(self, opening='{'):
+        self.opening = opening
+        self.complete = False
+        self._visible = []  # answer text outside reasoning blocks
+        self._json = []
+        self._pending = ''  # tail that may be the start of a tag split across chunks
+        self._thinking = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk):
+        """Add generated text; returns True once the JSON value is complete"""
+        self._pending += chunk
+        while self._pending and not self.complete:
+            tag = self.THINK_CLOSE if self._thinking else self.THINK_OPEN
+            index = self._pending.find(tag)
+            if index == -1:
+                # Keep a possible partial tag for the next chunk
+                keep = next((size for size in range(len(tag) - 1, 0, -1)
+                             if self._pending.endswith(tag[:size])), 0)
+                text, self._pending = self._pending[:len(self._pending) - keep], self._pending[len(self._pending) - keep:]
+                if not self._thinking:
+                    self._scan(text)
+                break
+            if not self._thinking:
+                self._scan(self._pending[:index])
+            self._pending = self._pending[index + len(tag):]
+            self._thinking = not self._thinking
+        return self.complete
+
+    def _scan(self, text):
+        self._visible.append(text)
+        for char in text:
+            if not self._depth:
+                if char in self.opening:
+                    self._json.append(char)
+                    self._depth = 1
+                continue
+            self._json.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if not self._depth:
+                    self.complete = True
+                    return
+
+    def result(self):
+        """The JSON text once complete, otherwise the whole answer without reasoning"""
+        if self.complete:
+            return ''.join(self._json)
+        if not self._thinking:
+            self._visible.append(self._pending)
+        return ''.join(self._visible).strip()
+
+
+class OllamaClient:
+    """Client for the Ollama /api/generate endpoint over a pooled keep-alive session"""
+
+    def __init__(self, base_url=None, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 connect_timeout=OLLAMA_CONNECT_TIMEOUT, read_timeout=OLLAMA_READ_TIMEOUT,
+                 generation_timeout=OLLAMA_GENERATION_TIMEOUT,
+                 pool_size=OLLAMA_POOL_SIZE, breaker=None):
+        self.base_url = base_url or f"http://{OLLAMA_HOST}:{OLLAMA_PORT}"
+        self.model = model
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.generation_timeout = generation_timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def generate_json(self, prompt, model=None, timeout=None, opening='{', generation_timeout=None):
+        """
+        Stream a generation and stop it as soon as the first JSON value of the answer
+        (starting with one of the `opening` characters) is complete.
+        Returns the JSON text, or the answer without reasoning if no complete value arrives.
+        Raises LLMUnavailableError right away while the circuit breaker is open, and
+        requests.Timeout once the generation runs longer than generation_timeout seconds.
+        """
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive
+        }
+        scanner = JSONStreamScanner(opening)
+        generation_timeout = generation_timeout or self.generation_timeout
+        deadline = time.monotonic() + generation_timeout
+        self.breaker.before_call()
+        try:
+            # Leaving the block closes the connection, which makes Ollama stop generating
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=timeout or self.timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        raise requests.RequestException(chunk['error'])
+                    if scanner.feed(chunk.get('response', '')) or chunk.get('done'):
+                        break
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout(f"generation took longer than {generation_timeout:.0f}s")
+        except requests.ConnectionError as e:
+            self.breaker.record_failure()
+            # requests reports a read timeout in the middle of a stream as a ConnectionError
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise requests.ReadTimeout(*e.args) from e
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return scanner.result()
+
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Return the process-wide Ollama client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaClient()
+    return _client
@@ -0,0 +1,300 @@
+# ============================================================
+# DevMatch AI - Persistent Cache for DeepSeek Match Analyses
+# ============================================================
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process single-flight
+    fcntl = None
+
+from models import db, AnalysisCache
+from modelai3 import (DEEPSEEK_MODEL, SCORE_FIELDS, build_match_prompt, analyze_with_deepseek,
+                      analyze_batch_with_deepseek, normalize_analysis)
+
+# Seconds a cached analysis stays valid (default: 7 days)
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Maximum number of cached analyses, least recently used entries are evicted first
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '10000'))
+
+# Directory for cross-process lock files (e.g. several gunicorn workers); empty disables them
+ANALYSIS_LOCK_DIR = os.getenv('ANALYSIS_LOCK_DIR', '')
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def analysis_cache_key(project, developer, model=DEEPSEEK_MODEL):
+    """Content hash of the rendered prompt: any edit to the inputs changes the key"""
+    prompt = build_match_prompt(project, developer)
+    return hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+
+
+def get_cached_analysis(cache_key):
+    """Return the cached analysis for a key, or None if missing or expired"""
+    try:
+        entry = AnalysisCache.query.filter_by(cache_key=cache_key).first()
+        if not entry:
+            return None
+
+        # Expired entries and ones stored before scores were validated are dropped
+        analysis = normalize_analysis(json.loads(entry.result))
+        if analysis is None or entry.created_at < datetime.now() - timedelta(seconds=ANALYSIS_CACHE_TTL):
+            db.session.delete(entry)
+            db.session.commit()
+            return None
+
+        entry.hits += 1
+        entry.last_used_at = datetime.now()
+        db.session.commit()
+        return analysis
+    except Exception as e:
+        print(f"❌ Error reading analysis cache: {e}")
+        db.session.rollback()
+        return None
+
+
+def store_analysis(cache_key, analysis, model=DEEPSEEK_MODEL):
+    """Store an analysis in the cache and evict the oldest entries if over the limit"""
+    try:
+        now = datetime.now()
+        entry = AnalysisCache.query.filter_by(cache_key=cache_key).first()
+        if entry:
+            entry.result = json.dumps(analysis)
+            entry.created_at = now
+            entry.last_used_at = now
+        else:
+            db.session.add(AnalysisCache(
+                cache_key=cache_key,
+                model=model,
+                result=json.dumps(analysis),
+                hits=0,
+                created_at=now,
+                last_used_at=now
+            ))
+        db.session.commit()
+        evict_analysis_cache()
+        return True
+    except Exception as e:
+        print(f"❌ Error storing analysis in cache: {e}")
+        db.session.rollback()
+        return False
+
+
+def evict_analysis_cache():
+    """Delete expired entries and the least recently used ones above the size limit"""
+    try:
+        expired_before = datetime.now() - timedelta(seconds=ANALYSIS_CACHE_TTL)
+        AnalysisCache.query.filter(AnalysisCache.created_at < expired_before).delete()
+
+        excess = AnalysisCache.query.count() - ANALYSIS_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest_ids = db.session.query(AnalysisCache.id).order_by(
+                AnalysisCache.last_used_at.asc()
+            ).limit(excess).subquery()
+            AnalysisCache.query.filter(AnalysisCache.id.in_(db.select(oldest_ids))).delete(
+                synchronize_session=False
+            )
+        db.session.commit()
+    except Exception as e:
+        print(f"❌ Error evicting analysis cache: {e}")
+        db.session.rollback()
+
+
+def clear_analysis_cache():
+    """Remove every cached analysis"""
+    try:
+        AnalysisCache.query.delete()
+        db.session.commit()
+        return True
+    except Exception as e:
+        print(f"❌ Error clearing analysis cache: {e}")
+        db.session.rollback()
+        return False
+
+
+# ============================================================
+# Single-flight: concurrent requests for the same prompt share one call
+# ============================================================
+
+class _Flight:
+    """An analysis in progress that other threads can wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+@contextmanager
+def _key_lock(cache_key):
+    """Exclusive lock on the lock file of one key; the holder removes the file when done"""
+    path = os.path.join(ANALYSIS_LOCK_DIR, f'analysis-{cache_key}.lock')
+    while True:
+        lock_file = open(path, 'a')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.samestat(os.fstat(lock_file.fileno()), os.stat(path)):
+                break
+        except FileNotFoundError:
+            pass
+        # The previous holder removed the file while we waited: lock the current one
+        lock_file.close()
+    try:
+        yield
+    finally:
+        # Removed while still locked, so lock files don't pile up
+        os.remove(path)
+        lock_file.close()
+
+
+@contextmanager
+def _process_locks(cache_keys):
+    """
+    Exclusive locks, one per key, shared by every process analyzing the same keys.
+    Taken in key order, so processes locking several keys can't deadlock.
+    Yields True when the locks were taken, False when cross-process locking is disabled.
+    """
+    cache_keys = sorted(set(cache_keys))
+    if not cache_keys or not ANALYSIS_LOCK_DIR or fcntl is None:
+        yield False
+        return
+
+    os.makedirs(ANALYSIS_LOCK_DIR, exist_ok=True)
+    with ExitStack() as locks:
+        for cache_key in cache_keys:
+            locks.enter_context(_key_lock(cache_key))
+        yield True
+
+
+def _analyze_and_store(cache_key, analyze, lock=True):
+    """Run analyze() for a cache miss and keep the result (lock=False: the caller holds the process lock)"""
+    with _process_locks([cache_key] if lock else []) as locked:
+        # Another process may have stored the analysis while we waited for the lock
+        if locked:
+            cached = get_cached_analysis(cache_key)
+            if cached is not None:
+                return cached
+
+        analysis = analyze()
+
+        # Unparseable model output comes back with every score at 0 and degraded
+        # (heuristic) scores stand in for an unavailable model: don't keep either
+        if not analysis.get('degraded') and any(analysis.get(field) for field in SCORE_FIELDS):
+            store_analysis(cache_key, analysis)
+        return analysis
+
+
+def _claim(cache_key):
+    """Start a flight for a key; returns (flight, True) if we lead it, (flight, False) if another call does"""
+    with _in_flight_lock:
+        flight = _in_flight.get(cache_key)
+        if flight is not None:
+            return flight, False
+        flight = _in_flight[cache_key] = _Flight()
+        return flight, True
+
+
+def _wait(flight):
+    """Result of a flight led by another call"""
+    flight.done.wait()
+    if flight.error is not None:
+        raise flight.error
+    return dict(flight.result)
+
+
+def _land(cache_key, flight):
+    """Wake up the callers waiting for a flight we lead, once its result or error is set"""
+    with _in_flight_lock:
+        del _in_flight[cache_key]
+    flight.done.set()
+
+
+def _lead(cache_key, flight, analyze, lock=True):
+    """Run the call of a flight we lead and wake up the callers waiting for it"""
+    try:
+        flight.result = _analyze_and_store(cache_key, analyze, lock)
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        _land(cache_key, flight)
+    return dict(flight.result)
+
+
+def analyze_with_cache(project, developer):
+    """
+    analyze_with_deepseek backed by the persistent cache.
+    Concurrent calls for the same prompt wait for the first one and share its result.
+    """
+    cache_key = analysis_cache_key(project, developer)
+    cached = get_cached_analysis(cache_key)
+    if cached is not None:
+        return cached
+
+    flight, leader = _claim(cache_key)
+    if not leader:
+        return _wait(flight)
+    return _lead(cache_key, flight, lambda: analyze_with_deepseek(project, developer))
+
+
+def analyze_many_with_cache(project, developers):
+    """
+    analyze_with_cache for several developers of a project, returned in the same order.
+    Cache misses are sent to the model together in one batched prompt; developers
+    missing from the batched answer are analyzed one by one.
+    """
+    cache_keys = [analysis_cache_key(project, developer) for developer in developers]
+    analyses = [None] * len(developers)
+    led = []
+    waiting = []
+    for index, cache_key in enumerate(cache_keys):
+        cached = get_cached_analysis(cache_key)
+        if cached is not None:
+            analyses[index] = cached
+            continue
+        flight, leader = _claim(cache_key)
+        (led if leader else waiting).append((index, flight))
+
+    with ExitStack() as locks:
+        # The batched call covers several keys: lock them all first, like a single call locks its key
+        locked = len(led) > 1 and locks.enter_context(_process_locks(cache_keys[index] for index, _ in led))
+        if locked:
+            # Another process may have stored some of them while we waited for the locks
+            for index, flight in list(led):
+                cached = get_cached_analysis(cache_keys[index])
+                if cached is not None:
+                    flight.result = analyses[index] = cached
+                    _land(cache_keys[index], flight)
+                    led.remove((index, flight))
+
+        batch = {}
+        if len(led) > 1:
+            try:
+                batch = analyze_batch_with_deepseek(project, [developers[index] for index, _ in led])
+            except Exception as e:
+                print(f"❌ Error in batched analysis for Project {project['id']}: {e}")
+
+        # Every led flight must land, even if an earlier one failed
+        error = None
+        for index, flight in led:
+            developer = developers[index]
+            try:
+                analyses[index] = _lead(cache_keys[index], flight,
+                                        lambda: batch.get(developer['id']) or analyze_with_deepseek(project, developer),
+                                        lock=not locked)
+            except Exception as e:
+                error = error or e
+    if error is not None:
+        raise error
+
+    for index, flight in waiting:
+        analyses[index] = _wait(flight)
+    return analyses
@@ -0,0 +1,86 @@
+# ============================================================
+# DevMatch AI - Bitset Technical Match Engine
+# ============================================================
+#
+# Technologies are encoded as integer bitmasks with one bit per
+# technology. Bits are handed out in the order technologies are first
+# seen, so masks stay as short as the number of technologies in use
+# whatever the Technology.id values are. The technical match of a pair
+# is then popcount(project & developer) / popcount(project) * 100,
+# the same value calculate_match_db() returns from name lists.
+
+import threading
+
+from sqlalchemy import select
+
+from models import db, Developer, Project, developer_skills, project_technologies
+
+
+# {technology_id: bit}; only ever grows, so masks built at different times stay comparable
+_bit_positions = {}
+_bit_positions_lock = threading.Lock()
+
+
+def _bit_position(technology_id):
+    """Bit of a technology, assigning the next free one the first time it is seen"""
+    position = _bit_positions.get(technology_id)
+    if position is None:
+        with _bit_positions_lock:
+            position = _bit_positions.setdefault(technology_id, len(_bit_positions))
+    return position
+
+
+def _build_masks(ids, pairs):
+    """Fold (owner_id, technology_id) pairs into {owner_id: bitmask}"""
+    masks = dict.fromkeys(ids, 0)
+    for owner_id, technology_id in pairs:
+        masks[owner_id] = masks.get(owner_id, 0) | (1 << _bit_position(technology_id))
+    return masks
+
+
+def load_developer_masks():
+    """Skill bitmask of every developer (developers without skills get 0)"""
+    developer_ids = db.session.execute(select(Developer.id)).scalars().all()
+    pairs = db.session.execute(
+        select(developer_skills.c.developer_id, developer_skills.c.technology_id)
+    ).all()
+    return _build_masks(developer_ids, pairs)
+
+
+def load_project_masks(project_ids=None):
+    """Required technology bitmask of the given projects (all projects by default)"""
+    ids_query = select(Project.id)
+    pairs_query = select(project_technologies.c.project_id, project_technologies.c.technology_id)
+    if project_ids is not None:
+        ids_query = ids_query.where(Project.id.in_(project_ids))
+        pairs_query = pairs_query.where(project_technologies.c.project_id.in_(project_ids))
+    project_ids = db.session.execute(ids_query).scalars().all()
+    return _build_masks(project_ids, db.session.execute(pairs_query).all())
+
+
+def score_mask(project_mask, developer_masks):
+    """Technical match percentage of one project mask against every developer mask"""
+    required = project_mask.bit_count()
+    if not required:
+        return dict.fromkeys(developer_masks, 0)
+    return {
+        developer_id: (project_mask & developer_mask).bit_count() / required * 100
+        for developer_id, developer_mask in developer_masks.items()
+    }
+
+
+def score_project(project_id, developer_masks=None):
+    """Technical match of a project against all developers: {developer_id: percentage}"""
+    if developer_masks is None:
+        developer_masks = load_developer_masks()
+    project_mask = load_project_masks([project_id]).get(project_id, 0)
+    return score_mask(project_mask, developer_masks)
+
+
+def score_all_projects():
+    """Technical match of every project against every developer: {project_id: {developer_id: percentage}}"""
+    developer_masks = load_developer_masks()
+    return {
+        project_id: score_mask(project_mask, developer_masks)
+        for project_id, project_mask in load_project_masks().items()
+    }
@@ -0,0 +1,161 @@
+# ============================================================
+# DevMatch AI - Concurrent Fan-out of Match Analyses
+# ============================================================
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app
+
+from llm_client import OLLAMA_NUM_PARALLEL, OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT
+from match_cache import analysis_cache_key, analyze_many_with_cache, analyze_with_cache, get_cached_analysis
+
+# Seconds a single analysis may take before its result is replaced by a timeout notice
+MATCH_CALL_TIMEOUT = float(os.getenv('MATCH_CALL_TIMEOUT',
+                                     str(OLLAMA_CONNECT_TIMEOUT + OLLAMA_READ_TIMEOUT)))
+
+# Developers analyzed together in one prompt (1 = one prompt per developer)
+MATCH_BATCH_SIZE = max(1, int(os.getenv('MATCH_BATCH_SIZE', '1')))
+
+# Background job tasks running on the shared pool at once; the other workers stay free for web requests
+MATCH_JOB_WORKERS = max(1, int(os.getenv('MATCH_JOB_WORKERS', str(max(1, OLLAMA_NUM_PARALLEL - 1)))))
+
+# Shared by every request so the total load never exceeds what the Ollama server runs in parallel
+_executor = ThreadPoolExecutor(max_workers=OLLAMA_NUM_PARALLEL, thread_name_prefix='llm-fanout')
+
+_background_tasks = deque()
+_background_running = 0
+_background_lock = threading.Lock()
+
+
+def submit_background_task(task, *args):
+    """
+    Queue a background job task for the shared pool. At most MATCH_JOB_WORKERS run at a
+    time and the next one is only submitted when one finishes, so web requests wait
+    behind a few job calls at most, never behind a whole job.
+    """
+    with _background_lock:
+        _background_tasks.append((task, args))
+    _dispatch_background_tasks()
+
+
+def _dispatch_background_tasks():
+    """Submit queued background tasks while fewer than MATCH_JOB_WORKERS are running"""
+    global _background_running
+    with _background_lock:
+        while _background_tasks and _background_running < MATCH_JOB_WORKERS:
+            task, args = _background_tasks.popleft()
+            _background_running += 1
+            _executor.submit(_run_background_task, task, args)
+
+
+def _run_background_task(task, args):
+    global _background_running
+    try:
+        return task(*args)
+    finally:
+        with _background_lock:
+            _background_running -= 1
+        _dispatch_background_tasks()
+
+
+def _timeout_analysis():
+    """
+    Placeholder for a developer whose call did not finish in time.
+    Marked degraded so it is never saved over an earlier result.
+    """
+    return {"technical_affinity": 0, "motivational_affinity": 0, "experience_relevance": 0,
+            "comment": "AI analysis timed out", "degraded": True}
+
+
+def _failed_analysis(error):
+    """Placeholder for a developer whose call raised an error (degraded, never saved)"""
+    return {"technical_affinity": 0, "motivational_affinity": 0, "experience_relevance": 0,
+            "comment": f"AI analysis failed: {error}", "degraded": True}
+
+
+def _run_in_context(app, analyze, project, developers):
+    """Worker task: analyze each developer of a group inside an application context"""
+    with app.app_context():
+        return [analyze(project, developer) for developer in developers]
+
+
+def _run_batch_in_context(app, project, developers):
+    """Worker task: analyze a group of developers in one batched prompt inside an application context"""
+    with app.app_context():
+        return analyze_many_with_cache(project, developers)
+
+
+def _resolved(analyses):
+    """A future that is already done"""
+    future = Future()
+    future.set_result(analyses)
+    return future
+
+
+def submit_analyses(project, developers, analyze=analyze_with_cache):
+    """
+    Submit the analysis of every developer for a project.
+    Returns (developers, future) pairs, the future giving one analysis per developer of its group.
+    With MATCH_BATCH_SIZE > 1 cached pairs are resolved right away and the misses are
+    sent MATCH_BATCH_SIZE developers per prompt; otherwise every developer is its own call.
+    """
+    app = current_app._get_current_object()
+    if MATCH_BATCH_SIZE <= 1 or analyze is not analyze_with_cache:
+        return [([developer], _executor.submit(_run_in_context, app, analyze, project, [developer]))
+                for developer in developers]
+
+    tasks = []
+    misses = []
+    for developer in developers:
+        cached = get_cached_analysis(analysis_cache_key(project, developer))
+        if cached is None:
+            misses.append(developer)
+        else:
+            tasks.append(([developer], _resolved([cached])))
+    for start in range(0, len(misses), MATCH_BATCH_SIZE):
+        group = misses[start:start + MATCH_BATCH_SIZE]
+        tasks.append((group, _executor.submit(_run_batch_in_context, app, project, group)))
+    return tasks
+
+
+def _time_budget(tasks, timeout):
+    """
+    Seconds allowed for all the tasks: calls run in waves of OLLAMA_NUM_PARALLEL,
+    each call allowed `timeout` seconds per developer it analyzes, plus one wave
+    for the background job calls already holding workers
+    """
+    running = [group for group, future in tasks if not future.done()]
+    if not running:
+        return 0
+    waves = math.ceil(len(running) / OLLAMA_NUM_PARALLEL)
+    if _background_running:
+        waves += 1
+    return timeout * waves * max(len(group) for group in running)
+
+
+def analyze_developers(project, developers, analyze=analyze_with_cache, timeout=MATCH_CALL_TIMEOUT):
+    """
+    Analyze all developers for a project in parallel (up to OLLAMA_NUM_PARALLEL calls at once).
+    Results are returned in the same order as developers.
+    """
+    tasks = submit_analyses(project, developers, analyze)
+    deadline = time.monotonic() + _time_budget(tasks, timeout)
+
+    results = {}
+    for group, future in tasks:
+        try:
+            analyses = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            analyses = [_timeout_analysis() for _ in group]
+        except Exception as e:
+            print(f"❌ Error analyzing developers {[developer.get('id') for developer in group]}: {e}")
+            analyses = [_failed_analysis(e) for _ in group]
+        for developer, analysis in zip(group, analyses):
+            results[id(developer)] = analysis
+    return [results[id(developer)] for developer in developers]
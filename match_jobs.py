@@ -0,0 +1,219 @@
+# ============================================================
+# DevMatch AI - Background Match Analysis Jobs
+# ============================================================
+
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from database import get_project_by_id, save_match_results
+from match_cache import analyze_many_with_cache, analyze_with_cache
+from match_executor import MATCH_BATCH_SIZE, _failed_analysis, submit_background_task
+from tech_index import get_candidate_developers
+from match_engine import score_project
+
+# Analyzed pairs saved together in one upsert
+MATCH_SAVE_BATCH_SIZE = int(os.getenv('MATCH_SAVE_BATCH_SIZE', '20'))
+
+# Finished jobs kept in memory so the status endpoint can still report them
+MAX_FINISHED_JOBS = 100
+
+# Seconds a follower waits for news before getting the unchanged job again (keeps SSE connections alive)
+MATCH_JOB_HEARTBEAT = 15
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_jobs_changed = threading.Condition(_jobs_lock)
+
+
+def _job_snapshot(job):
+    """Return a JSON friendly copy of a job"""
+    return {
+        'id': job['id'],
+        'project_id': job['project_id'],
+        'status': job['status'],
+        'total': job['total'],
+        'completed': job['completed'],
+        'failed': job['failed'],
+        'created_at': job['created_at'].isoformat(),
+        'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None
+    }
+
+
+def _prune_finished_jobs():
+    """Drop the oldest finished jobs (caller must hold the lock)"""
+    finished = [job for job in _jobs.values() if job['status'] in ('completed', 'failed')]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda job: job['finished_at'])
+    for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+        del _jobs[job['id']]
+
+
+def _finish_pairs(job_id, completed, failed):
+    """Update job counters after developer pairs have been processed"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return
+        job['completed'] += completed
+        job['failed'] += failed
+        if job['completed'] + job['failed'] >= job['total']:
+            job['status'] = 'completed' if job['completed'] else 'failed'
+            job['finished_at'] = datetime.now()
+            _prune_finished_jobs()
+        _jobs_changed.notify_all()
+
+
+def _publish_results(job_id, developers, analyses, technical_scores):
+    """Make the analyses of a batch visible to the streams following the job, before they are saved"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return
+        job['results'].extend(
+            {
+                'developer_id': developer['id'],
+                'technical_match': technical_scores.get(developer['id'], 0),
+                'ai_analysis': ai_analysis
+            } for developer, ai_analysis in zip(developers, analyses)
+        )
+        _jobs_changed.notify_all()
+
+
+def _take_batch(job_id, rows, analyzed):
+    """
+    Buffer the rows of `analyzed` processed pairs (pairs whose analysis failed have no row).
+    Returns the rows to save once the batch is full or the job has no pairs left.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return rows
+        job['analyzed'] += analyzed
+        job['pending'].extend(rows)
+        if len(job['pending']) >= MATCH_SAVE_BATCH_SIZE or job['analyzed'] >= job['total']:
+            batch, job['pending'] = job['pending'], []
+            return batch
+        return []
+
+
+def _analyze_pairs(app, job_id, project, developers, technical_scores):
+    """Worker task: analyze project-developer pairs (one prompt per batch) and persist the results in batches"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job and job['status'] == 'queued':
+            job['status'] = 'running'
+
+    rows = []
+    analyses = []
+    try:
+        with app.app_context():
+            if len(developers) > 1:
+                analyses = analyze_many_with_cache(project, developers)
+            else:
+                analyses = [analyze_with_cache(project, developers[0])]
+            rows = [
+                {
+                    'project_id': project['id'],
+                    'developer_id': developer['id'],
+                    'technical_match': technical_scores.get(developer['id'], 0),
+                    'ai_analysis': ai_analysis
+                } for developer, ai_analysis in zip(developers, analyses)
+            ]
+    except Exception as e:
+        print(f"❌ Error analyzing Project {project['id']} - Developers {[developer['id'] for developer in developers]}: {e}")
+        analyses = [_failed_analysis(e) for _ in developers]
+    _publish_results(job_id, developers, analyses, technical_scores)
+
+    batch = _take_batch(job_id, rows, len(developers))
+    saved_count = 0
+    if batch:
+        try:
+            with app.app_context():
+                saved_count = save_match_results(batch)
+        except Exception as e:
+            print(f"❌ Error saving {len(batch)} match results for Project {project['id']}: {e}")
+
+    # Rows that weren't written (save errors, degraded analyses) count as failed pairs
+    _finish_pairs(job_id, saved_count, len(batch) - saved_count + len(developers) - len(rows))
+
+
+def enqueue_match_job(app, project_id, developers=None):
+    """
+    Enqueue the match analysis of a project against the given developers
+    (by default its candidate developers).
+    Returns the job snapshot, or None if the project does not exist.
+    If the project already has an active job, that job is returned instead.
+    """
+    project = get_project_by_id(project_id)
+    if not project:
+        return None
+    if developers is None:
+        developers = get_candidate_developers(project_id)
+    technical_scores = score_project(project_id)
+
+    job = {
+        'id': uuid.uuid4().hex,
+        'project_id': project_id,
+        'status': 'queued' if developers else 'completed',
+        'total': len(developers),
+        'completed': 0,
+        'failed': 0,
+        'analyzed': 0,
+        'pending': [],
+        'results': [],
+        'created_at': datetime.now(),
+        'finished_at': None if developers else datetime.now()
+    }
+    # Check and insert under one lock hold, so two requests can't both start a job
+    with _jobs_lock:
+        for active in _jobs.values():
+            if active['project_id'] == project_id and active['status'] in ('queued', 'running'):
+                return _job_snapshot(active)
+        _jobs[job['id']] = job
+        snapshot = _job_snapshot(job)
+
+    for start in range(0, len(developers), MATCH_BATCH_SIZE):
+        # Same pool as the web requests, so jobs never add load beyond OLLAMA_NUM_PARALLEL
+        submit_background_task(_analyze_pairs, app, job['id'], project,
+                               developers[start:start + MATCH_BATCH_SIZE], technical_scores)
+
+    return snapshot
+
+
+def get_match_job(job_id):
+    """Get the current status of a match job"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _job_snapshot(job) if job else None
+
+
+def _job_progress(job):
+    return job['status'], job['completed'], job['failed'], len(job['results'])
+
+
+def follow_match_job(job_id, heartbeat=MATCH_JOB_HEARTBEAT):
+    """
+    Yield (snapshot, results) each time a job makes progress, `results` being the
+    analyses published since the previous yield, until the job finishes.
+    Without progress the unchanged job is yielded again every `heartbeat` seconds.
+    """
+    seen = 0
+    last = None
+    while True:
+        with _jobs_changed:
+            _jobs_changed.wait_for(
+                lambda: job_id not in _jobs or _job_progress(_jobs[job_id]) != last, heartbeat
+            )
+            job = _jobs.get(job_id)
+            if not job:
+                return
+            last = _job_progress(job)
+            snapshot = _job_snapshot(job)
+            results = job['results'][seen:]
+        seen += len(results)
+        yield snapshot, results
+        if snapshot['status'] not in ('queued', 'running'):
+            return
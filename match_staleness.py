@@ -0,0 +1,234 @@
+# ============================================================
+# DevMatch AI - Incremental Match Recomputation
+# ============================================================
+#
+# A saved match result stays valid until one of its inputs changes:
+# the developer's skills, motivation or experiences, or the project's
+# description or required technologies. Edits to those mark only the
+# affected (project, developer) pairs as stale, in the same transaction,
+# and recompute_stale_matches() refreshes just those pairs.
+
+from flask import current_app
+from sqlalchemy import delete, event, or_, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from models import db, Developer, Experience, Project, MatchResult
+from database import (MATCH_SUMMARY_ENABLED, get_all_developers, get_developers_by_ids, get_project_by_id,
+                      get_saved_matches_for_project, refresh_match_summaries, save_match_results)
+from match_cache import SCORE_FIELDS
+from match_engine import load_developer_masks, score_project
+from match_executor import analyze_developers
+from match_jobs import enqueue_match_job, follow_match_job
+from tech_index import get_llm_candidate_ids, is_llm_candidate, prefiltered_analysis
+from ranking import combined_score
+
+# Attributes whose changes invalidate the saved matches of a developer or project
+DEVELOPER_MATCH_INPUTS = ('skills', 'motivation', 'experiences')
+PROJECT_MATCH_INPUTS = ('description', 'required_technologies')
+EXPERIENCE_MATCH_INPUTS = ('description', 'developer_id')
+
+
+def _has_changes(obj, attributes):
+    state = sa_inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+@event.listens_for(Session, 'after_flush')
+def mark_stale_matches(session, flush_context):
+    """Mark the saved matches affected by this flush as stale"""
+    developer_ids = set()
+    project_ids = set()
+
+    for obj in session.dirty:
+        if isinstance(obj, Developer) and _has_changes(obj, DEVELOPER_MATCH_INPUTS):
+            developer_ids.add(obj.id)
+        elif isinstance(obj, Project) and _has_changes(obj, PROJECT_MATCH_INPUTS):
+            project_ids.add(obj.id)
+        elif isinstance(obj, Experience) and _has_changes(obj, EXPERIENCE_MATCH_INPUTS):
+            developer_ids.add(obj.developer_id)
+            developer_ids.update(sa_inspect(obj).attrs.developer_id.history.deleted)
+
+    # New and deleted experiences change the experiences of their developer
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Experience):
+            developer_ids.add(obj.developer_id)
+
+    developer_ids.discard(None)
+    if not developer_ids and not project_ids:
+        return
+    session.connection().execute(
+        update(MatchResult).where(or_(
+            MatchResult.developer_id.in_(developer_ids),
+            MatchResult.project_id.in_(project_ids)
+        )).values(is_stale=True)
+    )
+
+
+def needs_analysis(saved_match):
+    """True if a saved match is stale or its AI analysis failed (every score at 0)"""
+    return saved_match['is_stale'] or not any(saved_match['ai_analysis'].get(field) for field in SCORE_FIELDS)
+
+
+def analyze_and_save(project, developers, technical_scores):
+    """Analyze developers for a project concurrently and upsert the results; returns the matches"""
+    analyses = analyze_developers(project, developers)
+    matches = [
+        {
+            "developer": developer,
+            "technical_match": technical_scores.get(developer['id'], 0),
+            "ai_analysis": ai_analysis
+        } for developer, ai_analysis in zip(developers, analyses)
+    ]
+    save_match_results([
+        {
+            "project_id": project['id'],
+            "developer_id": match["developer"]["id"],
+            "technical_match": match["technical_match"],
+            "ai_analysis": match["ai_analysis"]
+        } for match in matches
+    ])
+    return matches
+
+
+def _prefer_saved(analyzed, saved):
+    """A new analysis, unless it is a degraded (heuristic) one and an earlier AI result exists"""
+    if analyzed is None or (analyzed['ai_analysis'].get('degraded') and saved):
+        return saved
+    return analyzed
+
+
+def get_project_matches(project):
+    """
+    Matches of a project against every developer.
+    Fresh saved results are reused; only missing, stale or failed pairs of the LLM
+    candidates are analyzed again. Developers outside the prefilter's top-K keep
+    their saved result or are shown with their technical score only.
+    """
+    saved = {match['developer']['id']: match for match in get_saved_matches_for_project(project['id'])}
+    developers = get_all_developers()
+    candidate_ids = get_llm_candidate_ids(project['id'])
+    technical_scores = score_project(project['id'])
+
+    to_analyze = [developer for developer in developers
+                  if is_llm_candidate(developer, candidate_ids)
+                  and (developer['id'] not in saved or needs_analysis(saved[developer['id']]))]
+    analyzed = {}
+    if to_analyze:
+        analyzed = {match['developer']['id']: match
+                    for match in analyze_and_save(project, to_analyze, technical_scores)}
+
+    return [
+        _prefer_saved(analyzed.get(developer['id']), saved.get(developer['id'])) or {
+            "developer": developer,
+            "technical_match": technical_scores.get(developer['id'], 0),
+            "ai_analysis": prefiltered_analysis()
+        } for developer in developers
+    ]
+
+
+def _analysis_event(developer_id, technical_match, ai_analysis):
+    return {
+        "developer_id": developer_id,
+        "ai_analysis": ai_analysis,
+        "score": combined_score(technical_match, *(ai_analysis.get(field) for field in SCORE_FIELDS))
+    }
+
+
+def stream_project_matches(project):
+    """
+    Generator of (event, data) pairs for progressively showing a project's matches:
+    'technical' for every developer right away, then 'analysis' for each AI result
+    (saved ones and developers outside the prefilter's top-K first, the rest as the
+    project's background job analyzes them), 'progress' with the job status, then 'done'.
+    The analysis runs in the background job, which saves its results even if the stream ends early.
+    """
+    saved = {match['developer']['id']: match for match in get_saved_matches_for_project(project['id'])}
+    developers = get_all_developers()
+    candidate_ids = get_llm_candidate_ids(project['id'])
+    technical_scores = score_project(project['id'])
+
+    yield 'start', {"project_id": project['id'], "total": len(developers)}
+    for developer in sorted(developers, key=lambda developer: -technical_scores.get(developer['id'], 0)):
+        technical_match = technical_scores.get(developer['id'], 0)
+        yield 'technical', {
+            "developer": developer,
+            "technical_match": technical_match,
+            "score": combined_score(technical_match, 0, 0, 0)
+        }
+
+    to_analyze = {}
+    for developer in developers:
+        match = saved.get(developer['id'])
+        candidate = is_llm_candidate(developer, candidate_ids)
+        if match and (not candidate or not needs_analysis(match)):
+            yield 'analysis', _analysis_event(developer['id'], match['technical_match'], match['ai_analysis'])
+        elif candidate:
+            to_analyze[developer['id']] = developer
+        else:
+            yield 'analysis', _analysis_event(developer['id'], technical_scores.get(developer['id'], 0),
+                                              prefiltered_analysis())
+
+    # A job already running for the project may not cover every developer: the second round starts one that does
+    app = current_app._get_current_object()
+    analyzed = 0
+    for _ in range(2):
+        job = enqueue_match_job(app, project['id'], list(to_analyze.values())) if to_analyze else None
+        if not job:
+            break
+        for snapshot, results in follow_match_job(job['id']):
+            yield 'progress', snapshot
+            for result in results:
+                if to_analyze.pop(result['developer_id'], None) is None:
+                    continue
+                analyzed += 1
+                match = saved.get(result['developer_id'])
+                if result['ai_analysis'].get('degraded') and match:
+                    yield 'analysis', _analysis_event(result['developer_id'], match['technical_match'],
+                                                      match['ai_analysis'])
+                else:
+                    yield 'analysis', _analysis_event(result['developer_id'], result['technical_match'],
+                                                      result['ai_analysis'])
+
+    yield 'done', {"total": len(developers), "analyzed": analyzed}
+
+
+def recompute_stale_matches(limit=None):
+    """
+    Recompute only the stale saved matches, project by project.
+    Returns the number of pairs refreshed.
+    """
+    query = select(MatchResult.project_id, MatchResult.developer_id).where(
+        MatchResult.is_stale.is_(True)
+    ).order_by(MatchResult.project_id, MatchResult.developer_id)
+    if limit:
+        query = query.limit(limit)
+
+    stale_pairs = {}
+    for project_id, developer_id in db.session.execute(query):
+        stale_pairs.setdefault(project_id, []).append(developer_id)
+    if not stale_pairs:
+        return 0
+
+    developer_masks = load_developer_masks()
+    refreshed = 0
+    for project_id, developer_ids in stale_pairs.items():
+        project = get_project_by_id(project_id)
+        developers = get_developers_by_ids(developer_ids) if project else []
+
+        # Results of deleted projects or developers can't be recomputed: drop them
+        missing_ids = set(developer_ids) - {developer['id'] for developer in developers}
+        if missing_ids:
+            db.session.execute(delete(MatchResult).where(
+                MatchResult.project_id == project_id,
+                MatchResult.developer_id.in_(missing_ids)
+            ))
+            if MATCH_SUMMARY_ENABLED:
+                refresh_match_summaries([project_id])
+            db.session.commit()
+        if not developers:
+            continue
+        matches = analyze_and_save(project, developers, score_project(project_id, developer_masks))
+        # Degraded analyses aren't saved: those pairs stay stale for the next run
+        refreshed += sum(1 for match in matches if not match['ai_analysis'].get('degraded'))
+    return refreshed
@@ -0,0 +1,44 @@
+# ============================================================
+# DevMatch AI - Migración de Índices de Auditoría
+# Este script crea los índices que usa la página /auditoria en tablas existentes
+# ============================================================
+
+from sqlalchemy import text
+
+from migrate_audit_fields import create_app
+from models import db
+
+# (nombre del índice, tabla, columnas); los nombres coinciden con los que genera db.create_all()
+AUDIT_INDEXES = [
+    ('ix_audit_history_entity', 'audit_history', 'entity_type, entity_id, fecha_modificacion'),
+    ('ix_developers_fecha_creacion', 'developers', 'fecha_creacion'),
+    ('ix_developers_fecha_modificacion', 'developers', 'fecha_modificacion'),
+    ('ix_projects_fecha_creacion', 'projects', 'fecha_creacion'),
+    ('ix_projects_fecha_modificacion', 'projects', 'fecha_modificacion'),
+]
+
+def migrate_audit_indexes():
+    """Crea los índices de auditoría que todavía no existen"""
+    app = create_app()
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            print("🔍 Verificando índices de auditoría...")
+
+            for index_name, table_name, columns in AUDIT_INDEXES:
+                print(f"  ➕ Creando índice '{index_name}' en '{table_name}' ({columns})...")
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+                connection.commit()
+                print(f"  ✅ Índice '{index_name}' verificado")
+
+            print("\n✅ Migración de índices de auditoría completada exitosamente!")
+            print("\n💡 En tablas grandes ejecute este script fuera del horario de mayor uso")
+
+if __name__ == '__main__':
+    try:
+        migrate_audit_indexes()
+    except Exception as e:
+        print(f"\n❌ Error durante la migración: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,83 @@
+# ============================================================
+# DevMatch AI - Migración a Historial de Auditoría Particionado
+# Este script convierte audit_history en una tabla particionada por mes (PostgreSQL)
+# ============================================================
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from audit_partitions import ensure_partitions, is_partitioned, month_start, oldest_month, AUDIT_COLUMNS
+from migrate_audit_fields import create_app
+from models import db
+
+def migrate_audit_partitions():
+    """Copia audit_history a una tabla particionada por mes de fecha_modificacion"""
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+
+        with db.engine.begin() as connection:
+            print("🔍 Verificando tabla 'audit_history'...")
+
+            if db.engine.dialect.name != 'postgresql':
+                print("  ⏭️  El particionado requiere PostgreSQL; audit_history se mantiene como tabla normal")
+                return
+            if is_partitioned(connection):
+                created = ensure_partitions(connection)
+                print(f"  ⏭️  audit_history ya está particionada; {len(created)} particiones nuevas creadas")
+                return
+
+            first_month = oldest_month(connection) or month_start(datetime.now())
+            columns = ', '.join(AUDIT_COLUMNS)
+
+            print("  🔄 Renombrando la tabla actual...")
+            connection.execute(text("ALTER TABLE audit_history RENAME TO audit_history_unpartitioned"))
+            connection.execute(text("ALTER TABLE audit_history_unpartitioned RENAME CONSTRAINT audit_history_pkey TO audit_history_unpartitioned_pkey"))
+            connection.execute(text("ALTER INDEX IF EXISTS ix_audit_history_entity RENAME TO ix_audit_history_unpartitioned_entity"))
+
+            # La clave primaria de una tabla particionada debe incluir la columna de partición
+            print("  ➕ Creando tabla particionada 'audit_history'...")
+            connection.execute(text("""
+                CREATE TABLE audit_history (
+                    id INTEGER NOT NULL DEFAULT nextval('audit_history_id_seq'),
+                    entity_type VARCHAR(50) NOT NULL,
+                    entity_id INTEGER NOT NULL,
+                    field_name VARCHAR(100) NOT NULL,
+                    old_value TEXT,
+                    new_value TEXT,
+                    usuario VARCHAR(100) NOT NULL,
+                    fecha_modificacion TIMESTAMP NOT NULL,
+                    PRIMARY KEY (id, fecha_modificacion)
+                ) PARTITION BY RANGE (fecha_modificacion)
+            """))
+            connection.execute(text("ALTER SEQUENCE audit_history_id_seq OWNED BY audit_history.id"))
+            connection.execute(text(
+                "CREATE INDEX ix_audit_history_entity ON audit_history (entity_type, entity_id, fecha_modificacion)"
+            ))
+
+            print(f"  ➕ Creando particiones mensuales desde {first_month.isoformat()}...")
+            created = ensure_partitions(connection, first_month)
+            connection.execute(text("CREATE TABLE IF NOT EXISTS audit_history_default PARTITION OF audit_history DEFAULT"))
+            print(f"  ✅ {len(created)} particiones mensuales y partición DEFAULT creadas")
+
+            print("  📦 Copiando registros existentes...")
+            copied = connection.execute(text(
+                f"INSERT INTO audit_history ({columns}) SELECT {columns} FROM audit_history_unpartitioned"
+            )).rowcount
+            connection.execute(text("DROP TABLE audit_history_unpartitioned"))
+            print(f"  ✅ {copied} registros copiados")
+
+        print("\n✅ Migración a historial particionado completada exitosamente!")
+        print("\n💡 Ejecute periódicamente 'python admin.py audit-partitions' para crear las particiones de los próximos meses")
+        print("   y 'python admin.py archive-audit' para archivar los meses fuera de la retención")
+
+if __name__ == '__main__':
+    try:
+        migrate_audit_partitions()
+    except Exception as e:
+        print(f"\n❌ Error durante la migración: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,121 @@
+# ============================================================
+# DevMatch AI - Migración de Resultados de Matching
+# Este script deja un único resultado por par proyecto-developer, convierte created_at
+# a TIMESTAMP, agrega is_stale, crea los índices de match_results y hace que
+# match_summaries se borre en cascada con su proyecto
+# ============================================================
+
+from sqlalchemy import text
+
+from migrate_audit_fields import create_app, check_column_exists
+from models import db
+
+# (nombre del índice, columnas); los nombres coinciden con los que genera db.create_all()
+MATCH_RESULT_INDEXES = [
+    ('ix_match_results_developer_id', 'developer_id'),
+    ('ix_match_results_technical_match', 'technical_match'),
+    ('ix_match_results_project_technical', 'project_id, technical_match DESC'),
+    ('ix_match_results_is_stale', 'is_stale'),
+]
+
+def get_column_type(connection, table_name, column_name):
+    """Tipo de una columna según information_schema (PostgreSQL)"""
+    query = text("""
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_name = :table_name
+        AND column_name = :column_name
+    """)
+    return connection.execute(query, {"table_name": table_name, "column_name": column_name}).scalar()
+
+def migrate_created_at(connection):
+    """Convierte match_results.created_at de texto ISO a TIMESTAMP"""
+    if connection.dialect.name == 'postgresql':
+        if get_column_type(connection, 'match_results', 'created_at') == 'timestamp without time zone':
+            print("  ⏭️  'match_results.created_at' ya es TIMESTAMP, omitiendo...")
+            return
+        connection.execute(text(
+            "ALTER TABLE match_results ALTER COLUMN created_at TYPE TIMESTAMP USING created_at::timestamp"
+        ))
+    else:
+        # SQLite guarda DateTime como texto 'AAAA-MM-DD HH:MM:SS'; isoformat() usaba 'T' como separador
+        connection.execute(text("UPDATE match_results SET created_at = REPLACE(created_at, 'T', ' ')"))
+    connection.commit()
+    print("  ✅ 'match_results.created_at' convertido a TIMESTAMP")
+
+def migrate_summary_foreign_key(connection):
+    """Recrea la FK match_summaries.project_id con ON DELETE CASCADE (PostgreSQL)"""
+    if connection.dialect.name != 'postgresql':
+        print("  ⏭️  Solo es necesario en PostgreSQL, omitiendo...")
+        return
+    if not connection.execute(text("SELECT to_regclass('match_summaries') IS NOT NULL")).scalar():
+        print("  ⏭️  'match_summaries' no existe, omitiendo...")
+        return
+    connection.execute(text(
+        "ALTER TABLE match_summaries DROP CONSTRAINT IF EXISTS match_summaries_project_id_fkey"
+    ))
+    connection.execute(text(
+        "ALTER TABLE match_summaries ADD CONSTRAINT match_summaries_project_id_fkey "
+        "FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE"
+    ))
+    connection.commit()
+    print("  ✅ 'match_summaries.project_id' ahora usa ON DELETE CASCADE")
+
+def migrate_match_results():
+    """Elimina resultados duplicados, tipa created_at y crea los índices de match_results"""
+    app = create_app()
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            print("🔍 Verificando tabla 'match_results'...")
+
+            # Conservar el resultado más reciente (mayor id) de cada par
+            print("\n🧹 Eliminando resultados duplicados...")
+            deleted = connection.execute(text("""
+                DELETE FROM match_results
+                WHERE id NOT IN (
+                    SELECT MAX(id) FROM match_results GROUP BY project_id, developer_id
+                )
+            """)).rowcount
+            connection.commit()
+            print(f"  ✅ {deleted} resultados duplicados eliminados")
+
+            print("\n➕ Creando índice único 'uq_match_results_project_developer'...")
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_match_results_project_developer "
+                "ON match_results (project_id, developer_id)"
+            ))
+            connection.commit()
+            print("  ✅ Índice único verificado")
+
+            print("\n🕒 Migrando columna 'match_results.created_at'...")
+            migrate_created_at(connection)
+
+            print("\n📊 Verificando columna 'match_results.is_stale'...")
+            if not check_column_exists(connection, 'match_results', 'is_stale'):
+                connection.execute(text("ALTER TABLE match_results ADD COLUMN is_stale BOOLEAN NOT NULL DEFAULT FALSE"))
+                connection.commit()
+                print("  ✅ Columna 'match_results.is_stale' agregada exitosamente")
+            else:
+                print("  ⏭️  Columna 'match_results.is_stale' ya existe, omitiendo...")
+
+            print("\n➕ Creando índices de consulta...")
+            for index_name, columns in MATCH_RESULT_INDEXES:
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON match_results ({columns})"))
+                connection.commit()
+                print(f"  ✅ Índice '{index_name}' ({columns}) verificado")
+
+            print("\n🔗 Verificando FK 'match_summaries.project_id'...")
+            migrate_summary_foreign_key(connection)
+
+            print("\n✅ Migración de resultados de matching completada exitosamente!")
+            print("\n💡 save_match_results() ahora guarda cada lote con un único INSERT ... ON CONFLICT DO UPDATE")
+
+if __name__ == '__main__':
+    try:
+        migrate_match_results()
+    except Exception as e:
+        print(f"\n❌ Error durante la migración: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
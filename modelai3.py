@@ -3,8 +3,11 @@
 # ============================================================
 
 import json
-import subprocess
-from typing import Dict
+from typing import Dict, List
+
+import requests
+
+from llm_client import OLLAMA_MODEL, LLMUnavailableError, get_llm_client
 
 # -------------------------------
 # Pre-loaded data
@@ -95,12 +98,39 @@ def calculate_match(project: Dict, developer: Dict) -> float:
     return (len(matches) / len(required)) * 100
 
 
+EXPERIENCE_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+
+def heuristic_analysis(project: Dict, developer: Dict, reason: str = "") -> Dict:
+    """
+    Scores without the model (degraded mode): skills overlap and experience level.
+    Marked as degraded so they are never cached or saved as AI results.
+    """
+    required_level = EXPERIENCE_LEVELS.index(project["experience_level"]) \
+        if project.get("experience_level") in EXPERIENCE_LEVELS else 1
+    developer_level = EXPERIENCE_LEVELS.index(developer["experience_level"]) \
+        if developer.get("experience_level") in EXPERIENCE_LEVELS else 1
+    level_gap = required_level - developer_level
+    return {
+        "technical_affinity": round(calculate_match(project, developer)),
+        "motivational_affinity": 50,  # Unknown without the model: neutral
+        "experience_relevance": 100 if level_gap <= 0 else 50 if level_gap == 1 else 0,
+        "comment": f"Estimated without AI ({reason or 'AI analysis unavailable'}): skills overlap and experience level.",
+        "degraded": True
+    }
+
+
 # -------------------------------
 # DeepSeek integration (Ollama)
 # -------------------------------
 
-def analyze_with_deepseek(project: Dict, developer: Dict) -> str:
-    """Sends description and profile to DeepSeek for semantic analysis."""
+DEEPSEEK_MODEL = OLLAMA_MODEL
+
+SCORE_FIELDS = ('technical_affinity', 'motivational_affinity', 'experience_relevance')
+
+
+def build_match_prompt(project: Dict, developer: Dict) -> str:
+    """Renders the matching prompt for a project-developer pair."""
     experiences_text = "\n".join([f"- {exp}" for exp in developer["experiences"]])
     
     prompt = f"""
@@ -126,22 +156,138 @@ Pay special attention to how past experiences might relate to the project domain
 Respond in JSON format:
 {{"technical_affinity": X, "motivational_affinity": Y, "experience_relevance": Z, "comment": "brief explanation"}}
 """
-    result = subprocess.run(
-        ["ollama", "run", "deepseek-r1:1.5b"],
-        input=prompt.encode("utf-8"),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    output = result.stdout.decode("utf-8").strip()
-
-    # Try to parse JSON from model
+    return prompt
+
+
+def build_batch_match_prompt(project: Dict, developers: List[Dict]) -> str:
+    """Renders one prompt for a project and several developers, answered with a JSON array."""
+    profiles = []
+    for developer in developers:
+        experiences_text = "\n".join([f"- {exp}" for exp in developer["experiences"]])
+        profiles.append(f"""Developer ID: {developer['id']}
+Name: {developer['name']}
+Skills: {', '.join(developer['skills'])}
+Experience level: {developer['experience_level']}
+Motivation: {developer['motivation']}
+Previous Experiences:
+{experiences_text}""")
+    profiles_text = "\n\n".join(profiles)
+
+    prompt = f"""
+You are an intelligent matching assistant.
+Analyze if each of the following developers fits this project and explain why.
+
+Project:
+Name: {project['name']}
+Description: {project['description']}
+Required technologies: {', '.join(project['required_technologies'])}
+
+Developers:
+
+{profiles_text}
+
+For EACH developer, evaluate technical affinity and motivational affinity (0 to 100) considering both skills and relevant experiences.
+Pay special attention to how past experiences might relate to the project domain, even if indirectly.
+Respond with a JSON array containing one object per developer, using the Developer ID given above:
+[{{"developer_id": ID, "technical_affinity": X, "motivational_affinity": Y, "experience_relevance": Z, "comment": "brief explanation"}}]
+"""
+    return prompt
+
+
+def _score(value):
+    """0-100 integer score from a model value such as 80, 80.5 or "80%"."""
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    return min(max(round(float(value)), 0), 100)
+
+
+def normalize_analysis(item):
+    """Analysis with integer scores and a string comment from a parsed model object, or None if it is unusable."""
+    if not isinstance(item, dict):
+        return None
+    try:
+        scores = {field: _score(item[field]) for field in SCORE_FIELDS}
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    return {**scores, "comment": str(item.get("comment", ""))}
+
+
+def _batch_item_analysis(item, developer_ids):
+    """(developer_id, analysis) from one object of a batched response, or None if it is unusable."""
+    analysis = normalize_analysis(item)
+    if analysis is None:
+        return None
+    try:
+        developer_id = int(item.get("developer_id"))
+    except (TypeError, ValueError):
+        return None
+    if developer_id not in developer_ids:
+        return None
+    return developer_id, analysis
+
+
+def parse_batch_analyses(output: str, developer_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Per-developer analyses from a batched response, keyed by developer ID.
+    Every object is decoded on its own, so a malformed item (or a truncated array)
+    only loses that item; items without a known developer ID or valid scores are left out.
+    """
+    developer_ids = set(developer_ids)
+    decoder = json.JSONDecoder()
+    analyses = {}
+    position = output.find("{")
+    while position != -1:
+        try:
+            item, end = decoder.raw_decode(output, position)
+        except ValueError:
+            position = output.find("{", position + 1)
+            continue
+        parsed = _batch_item_analysis(item, developer_ids)
+        if parsed:
+            analyses.setdefault(*parsed)
+            position = output.find("{", end)
+        else:
+            # Maybe a wrapper object: look for items inside it
+            position = output.find("{", position + 1)
+    return analyses
+
+
+def analyze_batch_with_deepseek(project: Dict, developers: List[Dict]) -> Dict[int, Dict]:
+    """
+    Sends one project and several developer profiles to DeepSeek in a single prompt.
+    Returns the analyses that could be parsed, keyed by developer ID; callers analyze
+    the missing developers one by one.
+    """
+    prompt = build_batch_match_prompt(project, developers)
+    try:
+        output = get_llm_client().generate_json(prompt, model=DEEPSEEK_MODEL, opening="[{")
+    except (LLMUnavailableError, requests.RequestException):
+        # The single-pair fallback answers right away with heuristic scores
+        return {}
+    return parse_batch_analyses(output, [developer["id"] for developer in developers])
+
+
+def analyze_with_deepseek(project: Dict, developer: Dict) -> str:
+    """Sends description and profile to DeepSeek for semantic analysis."""
+    prompt = build_match_prompt(project, developer)
+    try:
+        output = get_llm_client().generate_json(prompt, model=DEEPSEEK_MODEL)
+    except LLMUnavailableError as e:
+        # Circuit breaker open: answer right away with heuristic scores
+        return heuristic_analysis(project, developer, str(e))
+    except requests.RequestException as e:
+        return heuristic_analysis(project, developer, f"AI analysis unavailable: {e}")
+
+    # Try to parse JSON from model; scores that aren't numbers are treated like unparseable output
     try:
         start = output.find("{")
         end = output.rfind("}") + 1
-        parsed = json.loads(output[start:end])
-        return parsed
+        analysis = normalize_analysis(json.loads(output[start:end]))
     except Exception:
+        analysis = None
+    if analysis is None:
         return {"technical_affinity": 0, "motivational_affinity": 0, "experience_relevance": 0, "comment": output}
+    return analysis
 
 
 # -------------------------------
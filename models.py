@@ -3,14 +3,16 @@
 # ============================================================
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Text, Table, Column, ForeignKey, DateTime, event
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, selectinload, Session
+from sqlalchemy import Boolean, Integer, String, Text, Table, Column, ForeignKey, DateTime, Index, UniqueConstraint, event
 from sqlalchemy import inspect as sa_inspect
 from typing import List
 from datetime import datetime
 import json
 import os
 
+from audit_sink import AUDIT_ASYNC, audit_sink
+
 class Base(DeclarativeBase):
     pass
 
@@ -50,12 +52,13 @@ class Technology(db.Model):
     def __repr__(self):
         return f'<Technology {self.name}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category
+    def to_dict(self, fields=None):
+        serializers = {
+            'id': lambda: self.id,
+            'name': lambda: self.name,
+            'category': lambda: self.category
         }
+        return {field: serializers[field]() for field in (fields or serializers)}
 
 class Project(db.Model):
     __tablename__ = 'projects'
@@ -70,8 +73,8 @@ class Project(db.Model):
     # Campos de auditoría
     usuario_creacion: Mapped[str] = mapped_column(String(100), nullable=True)
     usuario_modificacion: Mapped[str] = mapped_column(String(100), nullable=True)
-    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=True)
-    fecha_modificacion: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
+    fecha_modificacion: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
     
     # Relationships
     required_technologies: Mapped[List["Technology"]] = relationship(
@@ -81,20 +84,27 @@ class Project(db.Model):
     def __repr__(self):
         return f'<Project {self.name}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'experience_level': self.experience_level,
-            'project_type': self.project_type,
-            'status': self.status,
-            'required_technologies': [tech.name for tech in self.required_technologies],
-            'usuario_creacion': self.usuario_creacion,
-            'usuario_modificacion': self.usuario_modificacion,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'fecha_modificacion': self.fecha_modificacion.isoformat() if self.fecha_modificacion else None
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the relations used by to_dict() in one extra statement"""
+        return cls.query.options(selectinload(cls.required_technologies))
+    
+    def to_dict(self, fields=None):
+        # Each field is only evaluated when requested, so unrequested relations are never loaded
+        serializers = {
+            'id': lambda: self.id,
+            'name': lambda: self.name,
+            'description': lambda: self.description,
+            'experience_level': lambda: self.experience_level,
+            'project_type': lambda: self.project_type,
+            'status': lambda: self.status,
+            'required_technologies': lambda: [tech.name for tech in self.required_technologies],
+            'usuario_creacion': lambda: self.usuario_creacion,
+            'usuario_modificacion': lambda: self.usuario_modificacion,
+            'fecha_creacion': lambda: self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'fecha_modificacion': lambda: self.fecha_modificacion.isoformat() if self.fecha_modificacion else None
         }
+        return {field: serializers[field]() for field in (fields or serializers)}
 
 class Experience(db.Model):
     __tablename__ = 'experiences'
@@ -110,12 +120,13 @@ class Experience(db.Model):
     def __repr__(self):
         return f'<Experience {self.id}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'description': self.description,
-            'category': self.category
+    def to_dict(self, fields=None):
+        serializers = {
+            'id': lambda: self.id,
+            'description': lambda: self.description,
+            'category': lambda: self.category
         }
+        return {field: serializers[field]() for field in (fields or serializers)}
 
 class Developer(db.Model):
     __tablename__ = 'developers'
@@ -131,8 +142,8 @@ class Developer(db.Model):
     # Campos de auditoría
     usuario_creacion: Mapped[str] = mapped_column(String(100), nullable=True)
     usuario_modificacion: Mapped[str] = mapped_column(String(100), nullable=True)
-    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=True)
-    fecha_modificacion: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
+    fecha_modificacion: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
     
     # Relationships
     skills: Mapped[List["Technology"]] = relationship(
@@ -145,35 +156,47 @@ class Developer(db.Model):
     def __repr__(self):
         return f'<Developer {self.name}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'experience_level': self.experience_level,
-            'motivation': self.motivation,
-            'email': self.email,
-            'linkedin': self.linkedin,
-            'github': self.github,
-            'skills': [skill.name for skill in self.skills],
-            'experiences': [exp.description for exp in self.experiences],
-            'usuario_creacion': self.usuario_creacion,
-            'usuario_modificacion': self.usuario_modificacion,
-            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'fecha_modificacion': self.fecha_modificacion.isoformat() if self.fecha_modificacion else None
+    @classmethod
+    def with_relations(cls):
+        """Query that loads the relations used by to_dict() in one extra statement each"""
+        return cls.query.options(selectinload(cls.skills), selectinload(cls.experiences))
+    
+    def to_dict(self, fields=None):
+        # Each field is only evaluated when requested, so unrequested relations are never loaded
+        serializers = {
+            'id': lambda: self.id,
+            'name': lambda: self.name,
+            'experience_level': lambda: self.experience_level,
+            'motivation': lambda: self.motivation,
+            'email': lambda: self.email,
+            'linkedin': lambda: self.linkedin,
+            'github': lambda: self.github,
+            'skills': lambda: [skill.name for skill in self.skills],
+            'experiences': lambda: [exp.description for exp in self.experiences],
+            'usuario_creacion': lambda: self.usuario_creacion,
+            'usuario_modificacion': lambda: self.usuario_modificacion,
+            'fecha_creacion': lambda: self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'fecha_modificacion': lambda: self.fecha_modificacion.isoformat() if self.fecha_modificacion else None
         }
+        return {field: serializers[field]() for field in (fields or serializers)}
 
 class MatchResult(db.Model):
     __tablename__ = 'match_results'
+    __table_args__ = (
+        # One saved result per project-developer pair; save_match_results() upserts on it
+        UniqueConstraint('project_id', 'developer_id', name='uq_match_results_project_developer'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(Integer, ForeignKey('projects.id'), nullable=False)
-    developer_id: Mapped[int] = mapped_column(Integer, ForeignKey('developers.id'), nullable=False)
-    technical_match: Mapped[float] = mapped_column(nullable=False)
+    developer_id: Mapped[int] = mapped_column(Integer, ForeignKey('developers.id'), nullable=False, index=True)
+    technical_match: Mapped[float] = mapped_column(nullable=False, index=True)
     ai_technical_affinity: Mapped[int] = mapped_column(Integer, nullable=True)
     ai_motivational_affinity: Mapped[int] = mapped_column(Integer, nullable=True)
     ai_experience_relevance: Mapped[int] = mapped_column(Integer, nullable=True)
     ai_comment: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[str] = mapped_column(String(50), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    is_stale: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, index=True)  # Inputs changed since the analysis
     
     # Relationships
     project: Mapped["Project"] = relationship()
@@ -192,12 +215,80 @@ class MatchResult(db.Model):
             'ai_motivational_affinity': self.ai_motivational_affinity,
             'ai_experience_relevance': self.ai_experience_relevance,
             'ai_comment': self.ai_comment,
-            'created_at': self.created_at
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'is_stale': self.is_stale
         }
 
+# Saved matches of a project, best technical match first (project_id lookups also use it)
+Index('ix_match_results_project_technical', MatchResult.project_id, MatchResult.technical_match.desc())
+
+class TechnicalScore(db.Model):
+    """Technical match of every open project against every developer, maintained by score_matrix.py"""
+    __tablename__ = 'technical_scores'
+    
+    project_id: Mapped[int] = mapped_column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    developer_id: Mapped[int] = mapped_column(Integer, ForeignKey('developers.id', ondelete='CASCADE'), primary_key=True, index=True)
+    matched_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Required technologies the developer has
+    required_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_match: Mapped[float] = mapped_column(nullable=False, default=0)  # matched_count / required_count * 100
+    
+    def __repr__(self):
+        return f'<TechnicalScore P{self.project_id}-D{self.developer_id}: {self.technical_match:.0f}%>'
+
+class MatchSummary(db.Model):
+    """Per-project aggregates of match_results, refreshed by save_match_results() when MATCH_SUMMARY_ENABLED"""
+    __tablename__ = 'match_summaries'
+    
+    project_id: Mapped[int] = mapped_column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    match_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_sum: Mapped[float] = mapped_column(nullable=False, default=0)
+    combined_sum: Mapped[float] = mapped_column(nullable=False, default=0)
+    
+    # Sum and non-null count of each AI score, so averages match AVG() over match_results
+    ai_technical_sum: Mapped[float] = mapped_column(nullable=False, default=0)
+    ai_technical_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ai_motivational_sum: Mapped[float] = mapped_column(nullable=False, default=0)
+    ai_motivational_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ai_experience_sum: Mapped[float] = mapped_column(nullable=False, default=0)
+    ai_experience_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    # Histogram buckets (see SCORE_BUCKETS in database.py): 0-20, 20-40, 40-60, 60-80, 80-100
+    technical_bucket_0: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_bucket_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_bucket_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_bucket_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    technical_bucket_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    combined_bucket_0: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    combined_bucket_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    combined_bucket_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    combined_bucket_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    combined_bucket_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<MatchSummary P{self.project_id}: {self.match_count} matches>'
+
+class AnalysisCache(db.Model):
+    """Cache of DeepSeek match analyses keyed by the hash of the rendered prompt"""
+    __tablename__ = 'analysis_cache'
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)  # sha256 of model + prompt
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    result: Mapped[str] = mapped_column(Text, nullable=False)  # JSON of the analysis
+    hits: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
+    
+    def __repr__(self):
+        return f'<AnalysisCache {self.cache_key[:12]}>'
+
 class AuditHistory(db.Model):
     """Modelo para almacenar el historial de cambios en los registros"""
     __tablename__ = 'audit_history'
+    __table_args__ = (
+        # Historial de una entidad, del cambio más reciente al más antiguo
+        Index('ix_audit_history_entity', 'entity_type', 'entity_id', 'fecha_modificacion'),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     entity_type: Mapped[str] = mapped_column(String(50), nullable=False)  # 'Developer' o 'Project'
@@ -244,44 +335,7 @@ def set_developer_audit_on_insert(mapper, connection, target):
 @event.listens_for(Developer, 'before_update')
 def set_developer_audit_on_update(mapper, connection, target):
     """Evento que se ejecuta antes de actualizar un Developer"""
-    inspector = sa_inspect(target)
-    
-    # Campos a excluir de la auditoría
-    excluded_fields = ['id', 'usuario_creacion', 'usuario_modificacion', 
-                      'fecha_creacion', 'fecha_modificacion', 'skills', 'experiences']
-    
-    # Obtener valores anteriores desde la base de datos
-    if inspector.has_identity:
-        try:
-            # Obtener el registro original desde la base de datos
-            original = db.session.query(Developer).filter_by(id=target.id).first()
-            if original:
-                for attr_key in inspector.mapper.attrs.keys():
-                    if attr_key not in excluded_fields:
-                        old_value = getattr(original, attr_key, None)
-                        new_value = getattr(target, attr_key, None)
-                        
-                        # Comparar valores (convertir a string para comparación segura)
-                        old_str = str(old_value) if old_value is not None else ''
-                        new_str = str(new_value) if new_value is not None else ''
-                        
-                        if old_str != new_str:
-                            # Registrar el cambio en AuditHistory
-                            audit_record = AuditHistory(
-                                entity_type='Developer',
-                                entity_id=target.id,
-                                field_name=attr_key,
-                                old_value=old_str if old_str else None,
-                                new_value=new_str if new_str else None,
-                                usuario=get_current_user(),
-                                fecha_modificacion=datetime.now()
-                            )
-                            db.session.add(audit_record)
-        except Exception as e:
-            # Si hay error, continuar sin historial
-            pass
-    
-    # Actualizar campos de auditoría
+    # Actualizar campos de auditoría (el historial se registra en before_flush)
     target.fecha_modificacion = datetime.now()
     target.usuario_modificacion = get_current_user()
 
@@ -297,43 +351,109 @@ def set_project_audit_on_insert(mapper, connection, target):
 @event.listens_for(Project, 'before_update')
 def set_project_audit_on_update(mapper, connection, target):
     """Evento que se ejecuta antes de actualizar un Project"""
-    inspector = sa_inspect(target)
-    
-    # Campos a excluir de la auditoría
-    excluded_fields = ['id', 'usuario_creacion', 'usuario_modificacion', 
-                      'fecha_creacion', 'fecha_modificacion', 'required_technologies']
-    
-    # Obtener valores anteriores desde la base de datos
-    if inspector.has_identity:
-        try:
-            # Obtener el registro original desde la base de datos
-            original = db.session.query(Project).filter_by(id=target.id).first()
-            if original:
-                for attr_key in inspector.mapper.attrs.keys():
-                    if attr_key not in excluded_fields:
-                        old_value = getattr(original, attr_key, None)
-                        new_value = getattr(target, attr_key, None)
-                        
-                        # Comparar valores (convertir a string para comparación segura)
-                        old_str = str(old_value) if old_value is not None else ''
-                        new_str = str(new_value) if new_value is not None else ''
-                        
-                        if old_str != new_str:
-                            # Registrar el cambio en AuditHistory
-                            audit_record = AuditHistory(
-                                entity_type='Project',
-                                entity_id=target.id,
-                                field_name=attr_key,
-                                old_value=old_str if old_str else None,
-                                new_value=new_str if new_str else None,
-                                usuario=get_current_user(),
-                                fecha_modificacion=datetime.now()
-                            )
-                            db.session.add(audit_record)
-        except Exception as e:
-            # Si hay error, continuar sin historial
-            pass
-    
-    # Actualizar campos de auditoría
+    # Actualizar campos de auditoría (el historial se registra en before_flush)
     target.fecha_modificacion = datetime.now()
-    target.usuario_modificacion = get_current_user()
\ No newline at end of file
+    target.usuario_modificacion = get_current_user()
+
+
+# Campos que no se registran en el historial de auditoría
+AUDIT_EXCLUDED_FIELDS = {'id', 'usuario_creacion', 'usuario_modificacion',
+                         'fecha_creacion', 'fecha_modificacion'}
+
+# Entidades auditadas
+AUDITED_MODELS = (Developer, Project)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Sin efecto: solo existe para activar active_history"""
+
+
+# Con active_history, asignar un atributo expirado (p. ej. después de un commit) carga
+# antes el valor guardado, de modo que el historial siempre tiene el valor anterior
+for _model in AUDITED_MODELS:
+    for _attr in sa_inspect(_model).column_attrs:
+        if _attr.key not in AUDIT_EXCLUDED_FIELDS:
+            event.listen(getattr(_model, _attr.key), 'set', _keep_old_value, active_history=True)
+
+
+def collect_audit_changes(target, usuario, fecha):
+    """
+    Obtiene los cambios de columnas de un objeto a partir del historial de atributos
+    de SQLAlchemy (valores antes y después del flush), sin volver a consultar la fila.
+    """
+    inspector = sa_inspect(target)
+    changes = []
+    for attr in inspector.mapper.column_attrs:
+        if attr.key in AUDIT_EXCLUDED_FIELDS:
+            continue
+        history = inspector.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        
+        old_value = history.deleted[0] if history.deleted else None
+        new_value = history.added[0] if history.added else None
+        
+        # Comparar valores (convertir a string para comparación segura)
+        old_str = str(old_value) if old_value is not None else ''
+        new_str = str(new_value) if new_value is not None else ''
+        
+        if old_str != new_str:
+            changes.append({
+                'entity_type': type(target).__name__,
+                'entity_id': target.id,
+                'field_name': attr.key,
+                'old_value': old_str if old_str else None,
+                'new_value': new_str if new_str else None,
+                'usuario': usuario,
+                'fecha_modificacion': fecha
+            })
+    return changes
+
+
+@event.listens_for(Session, 'before_flush')
+def collect_audit_history(session, flush_context, instances):
+    """Recolecta una vez por flush los cambios de todas las entidades auditadas modificadas"""
+    usuario = get_current_user()
+    fecha = datetime.now()
+    pending = session.info.setdefault('audit_pending', [])
+    for target in session.dirty:
+        if isinstance(target, AUDITED_MODELS) and sa_inspect(target).has_identity:
+            pending.extend(collect_audit_changes(target, usuario, fecha))
+
+
+@event.listens_for(Session, 'after_flush')
+def write_audit_history(session, flush_context):
+    """
+    Inserta todos los registros de AuditHistory del flush en un solo INSERT.
+    Con AUDIT_ASYNC se guardan hasta el commit y los escribe audit_sink en segundo plano.
+    """
+    pending = session.info.pop('audit_pending', None)
+    if not pending:
+        return
+    if AUDIT_ASYNC:
+        session.info['audit_engine'] = session.connection().engine
+        session.info.setdefault('audit_committed', []).extend(pending)
+    else:
+        session.connection().execute(AuditHistory.__table__.insert(), pending)
+
+
+@event.listens_for(Session, 'after_commit')
+def enqueue_audit_history(session):
+    """Envía al escritor asíncrono los registros de la transacción confirmada"""
+    rows = session.info.pop('audit_committed', None)
+    engine = session.info.pop('audit_engine', None)
+    if rows:
+        audit_sink.submit(engine, AuditHistory.__table__, rows)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_audit_history(session, previous_transaction):
+    """Descarta los cambios recolectados de un flush que no llegó a completarse"""
+    session.info.pop('audit_pending', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted_audit_history(session):
+    """Los registros de una transacción revertida nunca se escriben"""
+    session.info.pop('audit_committed', None)
+    session.info.pop('audit_engine', None)
@@ -0,0 +1,148 @@
+# ============================================================
+# DevMatch AI - Candidate Ranking
+# ============================================================
+#
+# Scores are ranked as NumPy arrays: one row per candidate and one
+# column per component (technical match, AI technical affinity,
+# AI motivational affinity, AI experience relevance). The combined
+# score is a weighted average of the columns, and the best K rows are
+# selected with argpartition before sorting only those K.
+
+import os
+
+import numpy as np
+
+from models import db, Developer, MatchResult
+from match_engine import score_project
+
+COMPONENTS = ('technical_match', 'ai_technical_affinity', 'ai_motivational_affinity', 'ai_experience_relevance')
+
+
+def parse_weights(value):
+    """Weights from a comma separated string, one per component, e.g. '2,1,1,1'"""
+    weights = np.array([float(weight) for weight in value.split(',')], dtype=float)
+    if weights.shape != (len(COMPONENTS),) or (weights < 0).any() or not weights.sum():
+        raise ValueError(f"expected {len(COMPONENTS)} non-negative weights, got '{value}'")
+    return weights
+
+
+# Relative weight of each component in the combined score (default: plain average)
+RANKING_WEIGHTS = parse_weights(os.getenv('RANKING_WEIGHTS', '1,1,1,1'))
+
+
+def combined_scores(components, weights=None):
+    """Weighted average of the component columns of an (N, 4) array, one score per row"""
+    weights = RANKING_WEIGHTS if weights is None else np.asarray(weights, dtype=float)
+    return components @ (weights / weights.sum())
+
+
+def combined_score(technical_match, ai_technical_affinity, ai_motivational_affinity, ai_experience_relevance,
+                   weights=None):
+    """Combined score (0 to 100) of a single candidate"""
+    components = np.array([technical_match, ai_technical_affinity, ai_motivational_affinity,
+                           ai_experience_relevance], dtype=float)
+    return float(combined_scores(np.nan_to_num(components), weights))
+
+
+def rank_indices(scores, k=None, min_score=None):
+    """
+    Indices of the best scores, best first. With k only the top k are returned:
+    argpartition selects them in O(N) and only those k are sorted.
+    Ties keep their original order.
+    """
+    indices = np.arange(len(scores))
+    if min_score is not None:
+        indices = indices[scores >= min_score]
+    if k is not None and k < len(indices):
+        indices = indices[np.argpartition(-scores[indices], k - 1)[:k]]
+        indices.sort()
+    return indices[np.argsort(-scores[indices], kind='stable')]
+
+
+def match_components(matches):
+    """(N, 4) component array of matches shaped like {technical_match, ai_analysis: {...}}"""
+    components = np.zeros((len(matches), len(COMPONENTS)))
+    for row, match in enumerate(matches):
+        ai_analysis = match['ai_analysis']
+        components[row] = (
+            match['technical_match'] or 0,
+            ai_analysis.get('technical_affinity') or 0,
+            ai_analysis.get('motivational_affinity') or 0,
+            ai_analysis.get('experience_relevance') or 0
+        )
+    return components
+
+
+def rank_matches(matches, k=None, weights=None):
+    """Matches (as used by the matching views) ordered by combined score, best first"""
+    if not matches:
+        return []
+    scores = combined_scores(match_components(matches), weights)
+    return [matches[index] for index in rank_indices(scores, k)]
+
+
+def rank_projects(projects_data):
+    """Projects (from get_projects_with_matches) ordered by match count, then average score, best first"""
+    if not projects_data:
+        return []
+    match_counts = np.array([project['match_count'] for project in projects_data], dtype=float)
+    average_scores = np.array([project['average_score'] for project in projects_data], dtype=float)
+    order = np.lexsort((-average_scores, -match_counts))
+    return [projects_data[index] for index in order]
+
+
+def load_score_arrays(project_id=None):
+    """
+    Saved match results of a project (or of all projects) as arrays:
+    (project_ids, developer_ids, components) with missing AI scores as 0.
+    """
+    query = db.session.query(MatchResult.project_id, MatchResult.developer_id,
+                             *[getattr(MatchResult, component) for component in COMPONENTS])
+    if project_id is not None:
+        query = query.filter(MatchResult.project_id == project_id)
+    rows = np.array(query.all(), dtype=float).reshape(-1, 2 + len(COMPONENTS))
+    return rows[:, 0].astype(int), rows[:, 1].astype(int), np.nan_to_num(rows[:, 2:])
+
+
+def rank_project_candidates(project_id, k=10, min_score=0, weights=None):
+    """
+    Top-K developers for a project ranked by combined score.
+    Technical scores come from the bitset engine and AI scores from the saved match results;
+    developers never analyzed by the AI are ranked with AI scores of 0.
+    """
+    technical_scores = score_project(project_id)
+    developer_ids = np.fromiter(technical_scores.keys(), dtype=int, count=len(technical_scores))
+    components = np.zeros((len(developer_ids), len(COMPONENTS)))
+    components[:, 0] = np.fromiter(technical_scores.values(), dtype=float, count=len(technical_scores))
+
+    # Place the saved AI scores on the rows of their developers
+    _, saved_ids, saved_components = load_score_arrays(project_id)
+    analyzed = np.zeros(len(developer_ids), dtype=bool)
+    if len(saved_ids) and len(developer_ids):
+        order = np.argsort(developer_ids)
+        positions = np.searchsorted(developer_ids, saved_ids, sorter=order)
+        positions = np.minimum(positions, len(developer_ids) - 1)
+        rows = order[positions]
+        found = developer_ids[rows] == saved_ids
+        components[rows[found], 1:] = saved_components[found, 1:]
+        analyzed[rows[found]] = True
+
+    scores = combined_scores(components, weights)
+    best = rank_indices(scores, k, min_score)
+
+    # Only the selected developers are loaded
+    names = dict(db.session.query(Developer.id, Developer.name).filter(
+        Developer.id.in_(developer_ids[best].tolist())
+    ).all()) if len(best) else {}
+    return [
+        {
+            'developer_id': int(developer_ids[index]),
+            'technical_match': float(components[index, 0]),
+            'ai_technical_affinity': float(components[index, 1]),
+            'ai_motivational_affinity': float(components[index, 2]),
+            'ai_experience_relevance': float(components[index, 3]),
+            'ai_analyzed': bool(analyzed[index]),
+            'score': float(scores[index]),
+            'developer_name': names.get(int(developer_ids[index]))
+        } for index in best
+    ]
@@ -0,0 +1,163 @@
+# ============================================================
+# DevMatch AI - Materialized Technical Match Matrix
+# ============================================================
+#
+# technical_scores holds the technical match of every open project
+# against every developer. Rows are computed in the database with one
+# set-based INSERT ... SELECT over the association tables:
+#
+#   technical_match = |required ∩ skills| / |required| * 100
+#
+# and recomputed for the affected projects and developers whenever
+# skills, required technologies or project status change.
+
+from sqlalchemy import and_, case, delete, event, func, insert, or_, select, true
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from models import db, Developer, Project, Technology, TechnicalScore, developer_skills, project_technologies
+
+# Only projects in this status get precomputed scores
+SCORED_PROJECT_STATUS = 'Open'
+
+
+def _scores_select(project_ids=None, developer_ids=None):
+    """SELECT of technical_scores rows for open projects × developers, optionally restricted"""
+    required = select(
+        project_technologies.c.project_id,
+        func.count().label('required_count')
+    ).group_by(project_technologies.c.project_id)
+    if project_ids and not developer_ids:
+        required = required.where(project_technologies.c.project_id.in_(project_ids))
+    required = required.subquery()
+
+    matched = select(
+        project_technologies.c.project_id,
+        developer_skills.c.developer_id,
+        func.count().label('matched_count')
+    ).select_from(project_technologies.join(
+        developer_skills, developer_skills.c.technology_id == project_technologies.c.technology_id
+    )).group_by(project_technologies.c.project_id, developer_skills.c.developer_id)
+    matched_scope = _scope(project_technologies.c.project_id, developer_skills.c.developer_id,
+                           project_ids, developer_ids)
+    if matched_scope is not None:
+        matched = matched.where(matched_scope)
+    matched = matched.subquery()
+
+    matched_count = func.coalesce(matched.c.matched_count, 0)
+    required_count = func.coalesce(required.c.required_count, 0)
+    query = select(
+        Project.id,
+        Developer.id,
+        matched_count,
+        required_count,
+        case((required_count > 0, matched_count * 100.0 / required_count), else_=0.0)
+    ).select_from(Project).join(Developer, true()).outerjoin(
+        required, required.c.project_id == Project.id
+    ).outerjoin(
+        matched, and_(matched.c.project_id == Project.id, matched.c.developer_id == Developer.id)
+    ).where(Project.status == SCORED_PROJECT_STATUS)
+
+    scope = _scope(Project.id, Developer.id, project_ids, developer_ids)
+    return query.where(scope) if scope is not None else query
+
+
+def _scope(project_column, developer_column, project_ids, developer_ids):
+    """Condition selecting pairs of the given projects or developers (None means every pair)"""
+    conditions = []
+    if project_ids:
+        conditions.append(project_column.in_(project_ids))
+    if developer_ids:
+        conditions.append(developer_column.in_(developer_ids))
+    return or_(*conditions) if conditions else None
+
+
+def refresh_technical_scores(connection, project_ids=None, developer_ids=None):
+    """
+    Recompute the technical_scores rows of the given projects and developers
+    (every row when both are None). Rows that no longer apply are deleted and the
+    rest are upserted with one INSERT ... SELECT ... ON CONFLICT DO UPDATE, so
+    concurrent refreshes of the same pairs don't collide on the primary key.
+    """
+    from database import _upsert_insert
+
+    scope = _scope(TechnicalScore.project_id, TechnicalScore.developer_id, project_ids, developer_ids)
+    columns = ['project_id', 'developer_id', 'matched_count', 'required_count', 'technical_match']
+    scores = _scores_select(project_ids, developer_ids)
+
+    upsert_insert = _upsert_insert(connection.dialect.name)
+    if upsert_insert is None:
+        statement = delete(TechnicalScore)
+        connection.execute(statement.where(scope) if scope is not None else statement)
+        connection.execute(insert(TechnicalScore).from_select(columns, scores))
+        return
+
+    # Rows of projects that are no longer open and of deleted projects or developers
+    obsolete = delete(TechnicalScore).where(or_(
+        TechnicalScore.project_id.not_in(select(Project.id).where(Project.status == SCORED_PROJECT_STATUS)),
+        TechnicalScore.developer_id.not_in(select(Developer.id))
+    ))
+    connection.execute(obsolete.where(scope) if scope is not None else obsolete)
+
+    statement = upsert_insert(TechnicalScore).from_select(columns, scores)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=['project_id', 'developer_id'],
+        set_={column: statement.excluded[column] for column in columns[2:]}
+    ))
+
+
+def rebuild_technical_scores():
+    """Rebuild the whole matrix"""
+    refresh_technical_scores(db.session.connection())
+    db.session.commit()
+
+
+def ensure_technical_scores():
+    """Populate the matrix if it is empty (e.g. right after the table is created)"""
+    if db.session.query(TechnicalScore.project_id).first() is None and \
+            db.session.query(Project.id).filter(Project.status == SCORED_PROJECT_STATUS).first() is not None:
+        rebuild_technical_scores()
+
+
+def get_developer_technical_scores(developer_id):
+    """Precomputed technical match of a developer against every open project: {project_id: percentage}"""
+    return dict(db.session.query(TechnicalScore.project_id, TechnicalScore.technical_match).filter(
+        TechnicalScore.developer_id == developer_id
+    ).all())
+
+
+# ============================================================
+# Keep the matrix fresh on association changes
+# ============================================================
+
+@event.listens_for(Session, 'after_flush')
+def refresh_changed_scores(session, flush_context):
+    """Recompute the rows of developers and projects whose technologies or status changed in this flush"""
+    developer_ids = set()
+    project_ids = set()
+    rebuild = False
+
+    for obj in session.new:
+        if isinstance(obj, Developer):
+            developer_ids.add(obj.id)
+        elif isinstance(obj, Project):
+            project_ids.add(obj.id)
+    for obj in session.dirty:
+        state = sa_inspect(obj)
+        if isinstance(obj, Developer) and state.attrs.skills.history.has_changes():
+            developer_ids.add(obj.id)
+        elif isinstance(obj, Project) and (state.attrs.required_technologies.history.has_changes()
+                                           or state.attrs.status.history.has_changes()):
+            project_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Developer):
+            developer_ids.add(obj.id)
+        elif isinstance(obj, Project):
+            project_ids.add(obj.id)
+        elif isinstance(obj, Technology):
+            rebuild = True
+
+    if rebuild:
+        refresh_technical_scores(session.connection())
+    elif developer_ids or project_ids:
+        refresh_technical_scores(session.connection(), project_ids, developer_ids)
@@ -0,0 +1,168 @@
+# ============================================================
+# DevMatch AI - Inverted Technology Index for Candidate Prefiltering
+# ============================================================
+
+import heapq
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+
+from models import db, Developer, Technology, developer_skills, project_technologies
+from database import get_all_developers, get_developers_by_ids
+
+# Only the top-K developers by technical overlap are sent to the LLM (0 = disabled)
+MATCH_PREFILTER_TOP_K = int(os.getenv('MATCH_PREFILTER_TOP_K', '0'))
+
+
+class TechnologyIndex:
+    """In-memory inverted index Technology.id -> developer ids, built from developer_skills"""
+
+    def __init__(self):
+        self._postings = {}
+        self._developer_techs = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Load the whole index from the developer_skills association table"""
+        rows = db.session.execute(
+            select(developer_skills.c.developer_id, developer_skills.c.technology_id)
+        ).all()
+        postings = {}
+        developer_techs = {}
+        for developer_id, technology_id in rows:
+            postings.setdefault(technology_id, set()).add(developer_id)
+            developer_techs.setdefault(developer_id, set()).add(technology_id)
+
+        with self._lock:
+            self._postings = postings
+            self._developer_techs = developer_techs
+            self._loaded = True
+
+    def invalidate(self):
+        """Force a full rebuild on next use"""
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.build()
+
+    def set_developer_skills(self, developer_id, technology_ids):
+        """Replace the indexed skills of a developer"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for technology_id in self._developer_techs.pop(developer_id, set()):
+                self._postings.get(technology_id, set()).discard(developer_id)
+            technology_ids = set(technology_ids)
+            if technology_ids:
+                self._developer_techs[developer_id] = technology_ids
+            for technology_id in technology_ids:
+                self._postings.setdefault(technology_id, set()).add(developer_id)
+
+    def overlap_counts(self, technology_ids):
+        """Number of the given technologies each developer has"""
+        self._ensure_loaded()
+        counts = Counter()
+        with self._lock:
+            for technology_id in set(technology_ids):
+                counts.update(self._postings.get(technology_id, ()))
+        return counts
+
+    def top_k(self, technology_ids, k):
+        """Ids of the k developers with the most technologies in common (ties by lowest id)"""
+        counts = self.overlap_counts(technology_ids)
+        best = heapq.nsmallest(k, counts.items(), key=lambda item: (-item[1], item[0]))
+        return [developer_id for developer_id, _ in best]
+
+
+technology_index = TechnologyIndex()
+
+
+def get_project_technology_ids(project_id):
+    """Ids of the technologies required by a project"""
+    return db.session.execute(
+        select(project_technologies.c.technology_id).where(
+            project_technologies.c.project_id == project_id
+        )
+    ).scalars().all()
+
+
+def get_llm_candidate_ids(project_id, k=MATCH_PREFILTER_TOP_K):
+    """Ids of the developers worth an LLM call for a project: the top-K by technical overlap, None when disabled"""
+    technology_ids = get_project_technology_ids(project_id) if k > 0 else []
+    if not technology_ids:
+        return None
+    return set(technology_index.top_k(technology_ids, k))
+
+
+def is_llm_candidate(developer, candidate_ids):
+    return candidate_ids is None or developer['id'] in candidate_ids
+
+
+def prefiltered_analysis():
+    """
+    Analysis shown for a developer outside the top-K: technical score only.
+    Marked degraded so it is never saved.
+    """
+    return {"technical_affinity": 0, "motivational_affinity": 0, "experience_relevance": 0,
+            "comment": "Not analyzed by AI: outside the best technical matches", "degraded": True}
+
+
+def get_candidate_developers(project_id, developers=None, k=MATCH_PREFILTER_TOP_K):
+    """
+    Developers to analyze with the LLM: the top-K by technical overlap, or all when disabled.
+    If a list of developer dicts is given it is filtered instead of loading from the database.
+    """
+    technology_ids = get_project_technology_ids(project_id) if k > 0 else []
+    if not technology_ids:
+        # Prefilter disabled or nothing to rank by
+        return developers if developers is not None else get_all_developers()
+
+    top_ids = technology_index.top_k(technology_ids, k)
+    if developers is None:
+        return get_developers_by_ids(top_ids)
+
+    by_id = {developer['id']: developer for developer in developers}
+    return [by_id[developer_id] for developer_id in top_ids if developer_id in by_id]
+
+
+# ============================================================
+# Keep the index fresh on skill edits
+# ============================================================
+
+@event.listens_for(Session, 'after_flush')
+def _collect_skill_changes(session, flush_context):
+    """Remember developers whose skills changed in this flush"""
+    pending = session.info.setdefault('tech_index_pending', {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Developer) and sa_inspect(obj).attrs.skills.history.has_changes():
+            pending[obj.id] = [tech.id for tech in obj.skills]
+    for obj in session.deleted:
+        if isinstance(obj, Developer):
+            pending[obj.id] = []
+        elif isinstance(obj, Technology):
+            session.info['tech_index_invalidate'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_skill_changes(session):
+    """Apply committed skill changes to the index"""
+    pending = session.info.pop('tech_index_pending', {})
+    if session.info.pop('tech_index_invalidate', False):
+        technology_index.invalidate()
+        return
+    for developer_id, technology_ids in pending.items():
+        technology_index.set_developer_skills(developer_id, technology_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_skill_changes(session):
+    """Rolled back changes never reach the index"""
+    session.info.pop('tech_index_pending', None)
+    session.info.pop('tech_index_invalidate', None)
@@ -0,0 +1,65 @@
+# ============================================================
+# DevMatch AI - Pruebas del Historial de Auditoría
+# ============================================================
+#
+# Ejecutar desde la raíz del proyecto: python -m unittest discover tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from models import db, Developer, AuditHistory
+
+
+class AuditHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def changes(self, developer):
+        rows = AuditHistory.query.filter_by(entity_type='Developer', entity_id=developer.id).order_by(AuditHistory.id)
+        return [(row.field_name, row.old_value, row.new_value) for row in rows]
+
+    def test_modify_after_commit_keeps_old_value(self):
+        """Los atributos expiran con el commit: el valor anterior debe cargarse igualmente"""
+        developer = Developer(name='AA', experience_level='Beginner', motivation='antes')
+        db.session.add(developer)
+        db.session.commit()
+
+        developer.name = 'AAA'
+        developer.motivation = 'después'
+        db.session.commit()
+
+        self.assertEqual(self.changes(developer), [
+            ('name', 'AA', 'AAA'),
+            ('motivation', 'antes', 'después'),
+        ])
+
+    def test_unchanged_value_is_not_logged(self):
+        developer = Developer(name='AA', experience_level='Beginner')
+        db.session.add(developer)
+        db.session.commit()
+
+        developer.name = 'AA'
+        db.session.commit()
+
+        self.assertEqual(self.changes(developer), [])
+
+
+if __name__ == '__main__':
+    unittest.main()